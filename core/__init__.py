@@ -6,14 +6,18 @@ from .auth import (
     create_access_token,
     verify_token,
     get_current_user,
+    invalidate_cached_user,
+    to_user_response,
     authenticate_user
 )
 from .config import settings
 from .database import Base, engine, SessionLocal, get_db
+from .rate_limit import limiter
 
 __all__ = [
     'pwd_context', 'security', 'verify_password', 'get_password_hash',
-    'create_access_token', 'verify_token', 'get_current_user', 'authenticate_user',
+    'create_access_token', 'verify_token', 'get_current_user', 'invalidate_cached_user', 'to_user_response', 'authenticate_user',
     'settings',
-    'Base', 'engine', 'SessionLocal', 'get_db'
+    'Base', 'engine', 'SessionLocal', 'get_db',
+    'limiter'
 ]
@@ -1,20 +1,96 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
 from passlib.context import CryptContext
+from argon2 import PasswordHasher, Type
+from argon2.exceptions import InvalidHashError, VerificationError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select, union_all
 from sqlalchemy.orm import Session
 from .config import settings
 from .database import get_db
 from .dev_config import DEV_MODE, MOCK_USER_ID, MOCK_TOKEN
+from .cache import TTLCache
 from models import User
+from schemas import UserResponse
+import hashlib
+import logging
+import time
 import uuid
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# New hashes use argon2id; existing bcrypt hashes still verify and are
+# upgraded on the user's next successful login
+logger = logging.getLogger("grovi.auth")
+
+ARGON2_TIME_COST = 2
+ARGON2_MEMORY_COST = 19456
+ARGON2_PARALLELISM = 1
+
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
+# Current-scheme hashes are verified with argon2-cffi directly, skipping passlib's
+# scheme detection; passlib is only needed for legacy bcrypt hashes
+_argon2_hasher = PasswordHasher(
+    time_cost=ARGON2_TIME_COST,
+    memory_cost=ARGON2_MEMORY_COST,
+    parallelism=ARGON2_PARALLELISM,
+    type=Type.ID,
+)
+ARGON2_PREFIX = "$argon2"
 security = HTTPBearer()
 
+# Built once so jose doesn't reconstruct the HMAC key on every encode/decode
+JWT_KEY = jwk.construct(settings.secret_key, settings.algorithm)
+JWT_ALGORITHMS = (settings.algorithm,)
+
+# Hashed once per process instead of on the request that creates the mock user
+MOCK_PASSWORD_HASH = pwd_context.hash("dev123") if DEV_MODE else None
+# Real JWTs are far longer than the mock token, so a length check rejects them cheaply
+_MOCK_TOKEN_LEN = len(MOCK_TOKEN)
+
+# Decoded token -> user_id, so repeat requests with the same token skip jwt.decode
+TOKEN_CACHE_TTL_SECONDS = 10
+_token_cache = TTLCache(maxsize=10_000, ttl=TOKEN_CACHE_TTL_SECONDS)
+
+def _token_cache_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+# user_id -> UserResponse snapshot, so authenticated requests skip the users lookup.
+# Snapshots (not ORM rows) are cached because rows expire when their session commits.
+# Only active users are cached; a user deactivated outside invalidate_cached_user
+# (e.g. directly in the database) can keep authenticating for up to the TTL.
+USER_CACHE_TTL_SECONDS = 30
+_user_cache = TTLCache(maxsize=10_000, ttl=USER_CACHE_TTL_SECONDS)
+
+def to_user_response(user: User) -> UserResponse:
+    """Snapshot a trusted ORM row as UserResponse without re-running validation"""
+    return UserResponse.model_construct(
+        id=user.id,
+        name=user.name,
+        username=user.username,
+        email=user.email,
+        date_of_birth=user.date_of_birth,
+        created_at=user.created_at,
+        is_active=user.is_active,
+    )
+
+def invalidate_cached_user(user_id) -> None:
+    """Drop a user's cached snapshot after their row changes"""
+    _user_cache.pop(str(user_id))
+
 def verify_password(plain_password, hashed_password):
+    if hashed_password.startswith(ARGON2_PREFIX):
+        try:
+            return _argon2_hasher.verify(hashed_password, plain_password)
+        except (VerificationError, InvalidHashError):
+            return False
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
@@ -27,16 +103,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+    encoded_jwt = jwt.encode(to_encode, JWT_KEY, algorithm=settings.algorithm)
     return encoded_jwt
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    token = credentials.credentials
+    cache_key = _token_cache_key(token)
+    user_id = _token_cache.get(cache_key)
+    if user_id is not None:
+        return user_id
+    
     # DEV_MODE: Accept mock token
-    if DEV_MODE and credentials.credentials == MOCK_TOKEN:
+    if DEV_MODE and len(token) == _MOCK_TOKEN_LEN and token == MOCK_TOKEN:
         return MOCK_USER_ID
     
     try:
-        payload = jwt.decode(credentials.credentials, settings.secret_key, algorithms=[settings.algorithm])
+        payload = jwt.decode(token, JWT_KEY, algorithms=JWT_ALGORITHMS)
         user_id: str = payload.get("sub")
         if user_id is None:
             raise HTTPException(
@@ -44,6 +126,12 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        # Never cache past the token's own expiry
+        exp = payload.get("exp")
+        if exp is not None:
+            remaining = exp - time.time()
+            if remaining > 0:
+                _token_cache.set(cache_key, user_id, ttl=remaining)
         return user_id
     except JWTError:
         raise HTTPException(
@@ -52,7 +140,11 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-def get_current_user(user_id: str = Depends(verify_token), db: Session = Depends(get_db)):
+def get_current_user(user_id: str = Depends(verify_token), db: Session = Depends(get_db)) -> UserResponse:
+    cached_user = _user_cache.get(user_id)
+    if cached_user is not None:
+        return cached_user
+    
     # DEV_MODE: Create or get mock user
     if DEV_MODE and user_id == MOCK_USER_ID:
         mock_user = db.query(User).filter(User.id == MOCK_USER_ID).first()
@@ -63,14 +155,16 @@ def get_current_user(user_id: str = Depends(verify_token), db: Session = Depends
                 name="นักพัฒนา",
                 username="developer",
                 email="dev@example.com",
-                password_hash=get_password_hash("dev123"),
+                password_hash=MOCK_PASSWORD_HASH,
                 is_active=True,
             )
             db.add(mock_user)
             db.commit()
             db.refresh(mock_user)
-            print("🔧 DEV_MODE: Created mock user in database")
-        return mock_user
+            logger.debug("DEV_MODE: Created mock user in database")
+        current_user = to_user_response(mock_user)
+        _user_cache.set(user_id, current_user)
+        return current_user
     
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
@@ -78,15 +172,38 @@ def get_current_user(user_id: str = Depends(verify_token), db: Session = Depends
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
-    return user
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Inactive user"
+        )
+    current_user = to_user_response(user)
+    _user_cache.set(user_id, current_user)
+    return current_user
 
 def authenticate_user(db: Session, username_or_email: str, password: str):
-    user = db.query(User).filter(
-        (User.username == username_or_email) | (User.email == username_or_email)
-    ).first()
+    # Two indexed equality lookups instead of a BitmapOr over both indexes;
+    # the is_active filter lets the planner use the partial indexes
+    lookup = union_all(
+        select(User).where(User.username == username_or_email, User.is_active.is_(True)),
+        select(User).where(User.email == username_or_email, User.is_active.is_(True)),
+    ).limit(1)
+    user = db.scalars(select(User).from_statement(lookup)).first()
     if not user:
         return False
-    if not verify_password(password, user.password_hash):
-        return False
+    if user.password_hash.startswith(ARGON2_PREFIX):
+        if not verify_password(password, user.password_hash):
+            return False
+        new_hash = None
+        if _argon2_hasher.check_needs_rehash(user.password_hash):
+            new_hash = get_password_hash(password)
+    else:
+        valid, new_hash = pwd_context.verify_and_update(password, user.password_hash)
+        if not valid:
+            return False
+    if new_hash:
+        user.password_hash = new_hash
+        db.commit()
+        db.refresh(user)
     return user
 
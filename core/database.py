@@ -7,11 +7,12 @@ SQLALCHEMY_DATABASE_URL = settings.database_url
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    pool_size=20,              # Base connections kept open
-    max_overflow=30,           # Additional connections when needed
-    pool_timeout=30,           # Timeout waiting for connection
-    pool_pre_ping=True,        # Verify connection before use
-    pool_recycle=1800,         # Recycle connections every 30 minutes
+    pool_size=settings.db_pool_size,          # Base connections kept open
+    max_overflow=settings.db_max_overflow,    # Additional connections when needed
+    pool_timeout=settings.db_pool_timeout,    # Timeout waiting for connection
+    pool_pre_ping=True,                       # Verify connection before use
+    pool_recycle=settings.db_pool_recycle,    # Recycle connections (default 30 minutes)
+    pool_use_lifo=True,                       # Reuse the warmest connection; let idle extras age out
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -0,0 +1,27 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+def configure_logging(level: int = logging.INFO) -> logging.Logger:
+    """Configure the "grovi" logger tree used by the application modules
+
+    Modules log through logging.getLogger("grovi.<module>") so one handler
+    here covers them all. Records are handed to a queue and written to stderr
+    by a listener thread, so logging from async code never blocks the event
+    loop on stream I/O. Safe to call more than once.
+    """
+    logger = logging.getLogger("grovi")
+    logger.setLevel(level)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, handler)
+        listener.start()
+        atexit.register(listener.stop)  # flush pending records on exit
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.propagate = False
+    return logger
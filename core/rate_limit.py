@@ -0,0 +1,9 @@
+# Rate limiting
+#
+# One limiter instance shared by main.py (app.state + 429 handler) and the
+# routers' @limiter.limit decorators. It is applied per route only; no
+# SlowAPIMiddleware is installed, so unlimited routes pay nothing for it.
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+
+limiter = Limiter(key_func=get_remote_address)
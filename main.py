@@ -1,55 +1,81 @@
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from starlette.routing import Route
 from contextlib import asynccontextmanager
+from anyio import to_thread
+import asyncio
 import uvicorn
 import os
 
+# Logging
+from core.logging_config import configure_logging
+
+logger = configure_logging()
+
 # Rate limiting
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
+from core.rate_limit import limiter
+
+# CORS
+from core.cors import FastOriginCORSMiddleware
 
 # Import routers
 from routers import auth, fields, vi_analysis, utils, tunnel
 
 # Import database
+from core.config import settings
 from core.database import Base, engine
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Production mode: multiple workers, schema managed out-of-band
+IS_PRODUCTION = os.environ.get("PRODUCTION", "false").lower() == "true"
+# Set RUN_MIGRATIONS=true on exactly one process (e.g. an init container) in production
+RUN_MIGRATIONS = os.environ.get("RUN_MIGRATIONS", "false").lower() == "true"
+# Per-request access lines are written synchronously to stderr; opt in only when needed
+ACCESS_LOG = os.environ.get("ACCESS_LOG", "false").lower() == "true"
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup: Initialize database and services
-    print("Starting Grovi API...")
+    logger.info("Starting Grovi API...")
     
-    # Create database tables if they don't exist
-    try:
-        Base.metadata.create_all(bind=engine)
-        print("Database tables created successfully")
-    except Exception as e:
-        print(f"Error creating database tables: {e}")
+    # Sync endpoints and dependencies (auth, DB queries, bcrypt) run in this pool
+    to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_size
+    
+    # Create database tables if they don't exist. Skipped on production
+    # workers so N workers don't race the same DDL on every start.
+    if not IS_PRODUCTION or RUN_MIGRATIONS:
+        try:
+            Base.metadata.create_all(bind=engine)
+            logger.info("Database tables created successfully")
+        except Exception as e:
+            logger.exception("Error creating database tables")
     
     # Initialize Google Earth Engine (optional - will work without it)
     try:
         from services import gee_service
-        print("Google Earth Engine service initialized")
+        logger.info("Google Earth Engine service initialized")
     except Exception as e:
-        print(f"Info: Google Earth Engine not available - real satellite data will not be accessible: {e}")
+        logger.info("Google Earth Engine not available - real satellite data will not be accessible: %s", e)
+    
+    # Warm the Nominatim connection pool without holding up startup
+    warm_up = asyncio.create_task(utils.warm_up_nominatim())
     
     yield
     
     # Shutdown
-    print("Shutting down Grovi API...")
+    warm_up.cancel()
+    logger.info("Shutting down Grovi API...")
+    await utils.nominatim_client.aclose()
 
 # Create FastAPI application
 app = FastAPI(
     title="Grovi - Crop Monitoring API",
     description="API for crop monitoring using satellite data and vegetation indices",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Add rate limiter to app
@@ -58,7 +84,7 @@ app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 # Configure CORS
 app.add_middleware(
-    CORSMiddleware,
+    FastOriginCORSMiddleware,
     allow_origins=[
         "http://localhost:3000", 
         "http://localhost:5173", 
@@ -88,6 +114,10 @@ app.include_router(vi_analysis.vi_router)
 app.include_router(utils.router)
 app.include_router(tunnel.router)
 
+# Liveness probes poll this constantly; answered by a bare ASGI app ahead of
+# the routers (still inside the middleware stack, so CORS keeps working)
+app.router.routes.insert(0, Route("/utils/health", endpoint=utils.RawHealthCheck(), methods=["GET", "HEAD"]))
+
 @app.get("/")
 def read_root():
     """Root endpoint"""
@@ -110,8 +140,8 @@ def health_check():
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler"""
-    print(f"Global exception: {exc}")
-    return JSONResponse(
+    logger.error("Unhandled error on %s %s", request.method, request.url.path, exc_info=exc)
+    return ORJSONResponse(
         status_code=500,
         content={
             "detail": "Internal server error",
@@ -120,26 +150,28 @@ async def global_exception_handler(request, exc):
     )
 
 if __name__ == "__main__":
-    print("Starting Grovi API server...")
+    logger.info("Starting Grovi API server...")
     
-    # Check production mode via environment variable
-    is_production = os.environ.get("PRODUCTION", "false").lower() == "true"
-    workers = int(os.environ.get("WORKERS", "4")) if is_production else 1
+    # Default to the usual 2*CPU+1, capped so a large host doesn't exhaust the DB pool
+    workers = min(int(os.environ.get("WORKERS", (os.cpu_count() or 1) * 2 + 1)), 16) if IS_PRODUCTION else 1
     
     try:
-        if is_production:
+        if IS_PRODUCTION:
             # Production mode: multiple workers, no reload
-            print(f"Running in PRODUCTION mode with {workers} workers")
+            logger.info("Running in PRODUCTION mode with %d workers", workers)
             uvicorn.run(
                 "main:app",
                 host="0.0.0.0",
                 port=8000,
                 workers=workers,
-                log_level="info"
+                loop="uvloop",
+                http="httptools",
+                log_level="info",
+                access_log=ACCESS_LOG
             )
         else:
             # Development mode: single worker with reload
-            print("Running in DEVELOPMENT mode")
+            logger.info("Running in DEVELOPMENT mode")
             uvicorn.run(
                 "main:app",
                 host="0.0.0.0",
@@ -148,6 +180,4 @@ if __name__ == "__main__":
                 log_level="info"
             )
     except Exception as e:
-        print(f"Failed to start server: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Failed to start server")
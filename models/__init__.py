@@ -6,10 +6,11 @@ from .models import (
     FieldThumbnail,
     VISnapshot,
     VITimeSeries,
-    ImportExportLog
+    ImportExportLog,
+    AnalysisJob
 )
 
 __all__ = [
     'Base', 'User', 'Field', 'FieldThumbnail',
-    'VISnapshot', 'VITimeSeries', 'ImportExportLog'
+    'VISnapshot', 'VITimeSeries', 'ImportExportLog', 'AnalysisJob'
 ]
@@ -1,28 +1,37 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, String, Float, DateTime, Text, ForeignKey, Boolean, Index, DDL, event, text
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.dialects.postgresql import UUID, JSONB, CITEXT
 from datetime import datetime
 import uuid
 
 Base = declarative_base()
 
+# users.email/username are CITEXT; the extension has to exist before create_all
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS citext"))
+
 class User(Base):
     __tablename__ = "users"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
-    username = Column(String, unique=True, nullable=False, index=True)
-    email = Column(String, unique=True, nullable=False, index=True)
-    password_hash = Column(String, nullable=False)
+    username = Column(CITEXT, unique=True, nullable=False, index=True)  # case-insensitive
+    email = Column(CITEXT, unique=True, nullable=False, index=True)  # case-insensitive
+    password_hash = Column(String(128), nullable=False)  # argon2id (~97 chars) or legacy bcrypt (60)
     date_of_birth = Column(DateTime, nullable=True)
-    age = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_active = Column(Boolean, default=True)
     
     # Relationships
     fields = relationship("Field", back_populates="owner")
+    
+    # Login looks active users up by username OR email; partial indexes keep
+    # inactive rows out and cover the columns it reads
+    __table_args__ = (
+        Index("ix_users_username_active", "username", postgresql_include=["id", "password_hash"], postgresql_where=text("is_active")),
+        Index("ix_users_email_active", "email", postgresql_include=["id", "password_hash"], postgresql_where=text("is_active")),
+    )
 
 class Field(Base):
     __tablename__ = "fields"
@@ -41,23 +50,42 @@ class Field(Base):
     address = Column(Text, nullable=True)
     address_en = Column(Text, nullable=True)  # English address
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     owner = relationship("User", back_populates="fields")
     thumbnails = relationship("FieldThumbnail", back_populates="field")
     snapshots = relationship("VISnapshot", back_populates="field")
     timeseries = relationship("VITimeSeries", back_populates="field")
+    # The field's single thumbnail (saving replaces it); only populated when a
+    # query eager-loads it, so single-field responses don't pay for the image
+    thumbnail_record = relationship("FieldThumbnail", uselist=False, viewonly=True, lazy="noload")
+    
+    @property
+    def thumbnail(self):
+        """Base64 thumbnail for FieldResponse, if it was loaded"""
+        return self.thumbnail_record.image_data if self.thumbnail_record else None
+    
+    # Field lists filter on user_id; single-field lookups go by primary key
+    __table_args__ = (
+        Index("ix_fields_user_id_id", "user_id", "id"),
+    )
 
 class FieldThumbnail(Base):
     __tablename__ = "thumbnails"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     field_id = Column(UUID(as_uuid=True), ForeignKey("fields.id"), nullable=False)
-    image_data = Column(Text, nullable=False)   
+    image_data = deferred(Column(Text, nullable=False))  # base64 data URL; loaded only when requested
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     field = relationship("Field", back_populates="thumbnails")
+    
+    # One thumbnail per field; saving upserts on this
+    __table_args__ = (
+        Index("uq_thumbnails_field_id", "field_id", unique=True),
+    )
 
 class VISnapshot(Base):
     __tablename__ = "snapshots"
@@ -70,13 +98,18 @@ class VISnapshot(Base):
     mean_value = Column(Float, nullable=False)
     min_value = Column(Float, nullable=True)
     max_value = Column(Float, nullable=True)
-    overlay_data = Column(Text, nullable=True) 
-    grid_data = Column(JSONB, nullable=True) 
+    overlay_data = deferred(Column(Text, nullable=True))  # base64 data URL; loaded only when requested
+    grid_data = deferred(Column(JSONB, nullable=True))  # not read by the API; load only on access
     status_message = Column(String(255), nullable=True)
     created_at = Column(DateTime, nullable=True)
     
     # Relationships
     field = relationship("Field", back_populates="snapshots")
+    
+    # Snapshot reads filter on field + VI type and want the newest first
+    __table_args__ = (
+        Index("ix_snapshots_field_vi_date", field_id, vi_type, snapshot_date.desc()),
+    )
 
 class VITimeSeries(Base):
     __tablename__ = "time_series"
@@ -90,6 +123,16 @@ class VITimeSeries(Base):
     
     # Relationships
     field = relationship("Field", back_populates="timeseries")
+    
+    # One value per field/index/date; GEE ingest inserts with ON CONFLICT DO NOTHING on this.
+    # Timeseries reads are range scans on the same key that only need vi_value,
+    # so it is included to make them index-only
+    __table_args__ = (
+        Index(
+            "uq_time_series_field_vi_date_value", "field_id", "vi_type", "measurement_date",
+            unique=True, postgresql_include=["vi_value"]
+        ),
+    )
 
 class ImportExportLog(Base):
     __tablename__ = "import_export"
@@ -101,3 +144,16 @@ class ImportExportLog(Base):
     file_name = Column(String, nullable=False)
     status = Column(String, nullable=False) 
     created_at = Column(DateTime, default=datetime.utcnow)
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    field_id = Column(UUID(as_uuid=True), ForeignKey("fields.id"), nullable=False)
+    vi_type = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="queued")  # queued, running, completed, failed
+    result = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,22 +1,14 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from core.database import get_db
 from models import User
 from schemas import UserCreate, UserLogin, UserResponse, Token
-from core.auth import authenticate_user, create_access_token, get_password_hash, get_current_user
+from core.auth import authenticate_user, create_access_token, get_password_hash, get_current_user, invalidate_cached_user, to_user_response
 from core.config import settings
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
-def calculate_age(date_of_birth: datetime) -> int:
-    """Calculate age from date of birth"""
-    today = datetime.today()
-    age = today.year - date_of_birth.year
-    if today.month < date_of_birth.month or (today.month == date_of_birth.month and today.day < date_of_birth.day):
-        age -= 1
-    return age
-
 @router.post("/register", response_model=Token)
 def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user"""
@@ -31,11 +23,6 @@ def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
             detail="Username or email already registered"
         )
     
-    # Calculate age if date of birth is provided
-    age = None
-    if user_data.date_of_birth:
-        age = calculate_age(user_data.date_of_birth)
-    
     # Create new user
     password_hash = get_password_hash(user_data.password)
     db_user = User(
@@ -43,8 +30,7 @@ def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
         username=user_data.username,
         email=user_data.email,
         password_hash=password_hash,
-        date_of_birth=user_data.date_of_birth,
-        age=age
+        date_of_birth=user_data.date_of_birth
     )
     
     db.add(db_user)
@@ -60,7 +46,7 @@ def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": UserResponse.model_validate(db_user)
+        "user": to_user_response(db_user)
     }
 
 @router.post("/login", response_model=Token)
@@ -73,6 +59,7 @@ def login_user(login_data: UserLogin, db: Session = Depends(get_db)):
             detail="Incorrect username/email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    invalidate_cached_user(user.id)
     
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
@@ -82,10 +69,10 @@ def login_user(login_data: UserLogin, db: Session = Depends(get_db)):
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": UserResponse.model_validate(user)
+        "user": to_user_response(user)
     }
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
+def get_current_user_info(current_user: UserResponse = Depends(get_current_user)):
     """Get current user information"""
-    return UserResponse.model_validate(current_user)
+    return current_user
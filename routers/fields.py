@@ -1,41 +1,146 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from fastapi.responses import JSONResponse, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, FileResponse
+from starlette.background import BackgroundTask
+from fastapi.concurrency import run_in_threadpool
 import tempfile
+import hashlib
+import logging
 import os
-import io
+import shutil
+import string
 import zipfile
-from sqlalchemy.orm import Session
+from xml.sax.saxutils import escape as xml_escape
+from sqlalchemy import DateTime, Text, delete, literal, select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from core.database import get_db
-from models import User, Field, FieldThumbnail
-from schemas import FieldCreate, FieldUpdate, FieldResponse, ThumbnailCreate, ThumbnailResponse
+from models import Field, FieldThumbnail
+from schemas import FieldCreate, FieldUpdate, FieldResponse, ThumbnailCreate, ThumbnailResponse, UserResponse
 from core.auth import get_current_user
+from core.cache import TTLCache
 from services import geocoding_service
-import json
+import ijson
+import orjson
 from shapely.geometry import shape
-from shapely.ops import transform
+import shapely
+import numpy as np
 import pyproj
-from uuid import UUID
+from uuid import UUID, uuid4
+from datetime import datetime
 
 router = APIRouter(prefix="/fields", tags=["fields"])
+logger = logging.getLogger("grovi.fields")
+
+# WGS84 -> UTM zone 47N (Thailand), built once; constructing a Transformer is far
+# more expensive than using one. This is the pipeline PROJ resolves for
+# from_crs('EPSG:4326', 'EPSG:32647', always_xy=True), given explicitly so
+# startup skips the CRS-to-CRS operation search (lng/lat in, metres out)
+_TO_UTM47N = pyproj.Transformer.from_pipeline(
+    '+proj=pipeline +step +proj=unitconvert +xy_in=deg +xy_out=rad '
+    '+step +proj=utm +zone=47 +ellps=WGS84'
+)
+
+def _project_to_utm47n(coords: np.ndarray) -> np.ndarray:
+    """Project an (N, 2) lng/lat array in one batched call"""
+    xs, ys = _TO_UTM47N.transform(coords[:, 0], coords[:, 1])
+    return np.column_stack((xs, ys))
+
+# One bound builtin call per vertex; also tolerates 3D positions
+_KML_COORD_FORMAT = "{0[0]},{0[1]},0".format
+_KML_DOCUMENT_TMPL = string.Template(
+    "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
+    "<kml xmlns=\"http://www.opengis.net/kml/2.2\">\n"
+    "  <Document>\n"
+    "    <name>$name</name>$placemarks\n"
+    "  </Document>\n"
+    "</kml>"
+)
+_KML_EXTENDED_DATA_TMPL = string.Template(
+    "      <ExtendedData>\n"
+    "        <Data name=\"crop_type\"><value>$crop_type</value></Data>\n"
+    "        <Data name=\"area_m2\"><value>$area_m2</value></Data>\n"
+    "        <Data name=\"planting_date\"><value>$planting_date</value></Data>\n"
+    "      </ExtendedData>\n"
+)
+_KML_PLACEMARK_TMPL = string.Template(
+    "\n    <Placemark>\n"
+    "      <name>$name</name>\n"
+    "$extended_data"
+    "      <Style><LineStyle><color>ff2b7a4b</color><width>2</width></LineStyle><PolyStyle><color>1a2b7a4b</color></PolyStyle></Style>\n"
+    "      <Polygon>\n"
+    "        <outerBoundaryIs><LinearRing><coordinates>$coords</coordinates></LinearRing></outerBoundaryIs>\n"
+    "      </Polygon>\n"
+    "    </Placemark>"
+)
+
+def _ring_moments(xs: np.ndarray, ys: np.ndarray):
+    """Shoelace area and first moments of a closed ring, normalized to positive area"""
+    # Shift to the first vertex so large coordinates don't cancel out
+    x0, y0 = xs[0], ys[0]
+    xs = xs - x0
+    ys = ys - y0
+    xn = np.roll(xs, -1)
+    yn = np.roll(ys, -1)
+    cross = xs * yn - xn * ys
+    area = cross.sum() / 2.0
+    mx = ((xs + xn) * cross).sum() / 6.0 + x0 * area
+    my = ((ys + yn) * cross).sum() / 6.0 + y0 * area
+    if area < 0:
+        return -area, -mx, -my
+    return area, mx, my
+
+def _polygon_area_and_centroid(polygons):
+    """Projected area (m²) and lng/lat centroid for GeoJSON polygon coordinate lists"""
+    area_m2 = 0.0
+    total = mx = my = 0.0
+    for rings in polygons:
+        for i, ring in enumerate(rings):
+            coords = np.asarray(ring, dtype=float)[:, :2]
+            sign = 1.0 if i == 0 else -1.0  # holes subtract
+            px, py = _TO_UTM47N.transform(coords[:, 0], coords[:, 1])
+            area_m2 += sign * _ring_moments(np.asarray(px), np.asarray(py))[0]
+            a, rx, ry = _ring_moments(coords[:, 0], coords[:, 1])
+            total += sign * a
+            mx += sign * rx
+            my += sign * ry
+    if total <= 0:
+        return None
+    return float(area_m2), float(my / total), float(mx / total)
 
 def calculate_area_and_centroid(geometry: dict):
     """Calculate area in square meters and centroid from GeoJSON geometry"""
     try:
+        # Fields are (multi)polygons: compute both analytically on the coordinate
+        # arrays and only fall back to shapely for other or degenerate shapes
+        geom_type = geometry.get("type")
+        if geom_type in ("Polygon", "MultiPolygon"):
+            coordinates = geometry["coordinates"]
+            polygons = [coordinates] if geom_type == "Polygon" else coordinates
+            result = _polygon_area_and_centroid(polygons)
+            if result is not None:
+                return result
+        
         geom = shape(geometry)
         # Transform to UTM zone 47N (Thailand) for accurate area in square meters
-        project = pyproj.Transformer.from_crs('EPSG:4326', 'EPSG:32647', always_xy=True).transform
-        projected_geom = transform(project, geom)
+        projected_geom = shapely.transform(geom, _project_to_utm47n)
         area_m2 = projected_geom.area
         centroid = geom.centroid
         return area_m2, centroid.y, centroid.x
     except Exception as e:
-        print(f"Error calculating area and centroid: {e}")
+        logger.warning("Error calculating area and centroid: %s", e)
         return 1000.0, 18.78, 98.98
 
+def _save_new_field(db: Session, db_field: Field) -> None:
+    db.add(db_field)
+    db.commit()
+    db.refresh(db_field)
+
 @router.post("/", response_model=FieldResponse)
-def create_field(field_data: FieldCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def create_field(field_data: FieldCreate, current_user: UserResponse = Depends(get_current_user), db: Session = Depends(get_db)):
     """Create a new field"""
+    # Async so the Nominatim round trip is awaited rather than holding a
+    # threadpool worker; the blocking DB work is still pushed to the threadpool
     try:
         area_m2, centroid_lat, centroid_lng = calculate_area_and_centroid(field_data.geometry)
         
@@ -44,7 +149,7 @@ def create_field(field_data: FieldCreate, current_user: User = Depends(get_curre
         if planting_date is None:
             planting_date = datetime.now()  # Default to today if not specified
             
-        address, address_en = geocoding_service.reverse_geocode_sync(centroid_lat, centroid_lng)
+        address, address_en = await geocoding_service.reverse_geocode(centroid_lat, centroid_lng)
         
         db_field = Field(
             name=field_data.name,
@@ -61,85 +166,52 @@ def create_field(field_data: FieldCreate, current_user: User = Depends(get_curre
             address_en=address_en
         )
         
-        db.add(db_field)
-        db.commit()
-        db.refresh(db_field)
+        await run_in_threadpool(_save_new_field, db, db_field)
         
-        return FieldResponse.model_validate(db_field)
+        return db_field
     except Exception as e:
-        import traceback
-        print(f"Error creating field: {e}")
-        print(f"Full traceback: {traceback.format_exc()}")
-        db.rollback()
+        logger.exception("Error creating field")
+        await run_in_threadpool(db.rollback)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create field: {str(e)}"
         )
 
 @router.get("/", response_model=List[FieldResponse])
-def get_user_fields(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_user_fields(current_user: UserResponse = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get all fields for current user with thumbnails included"""
-    fields = db.query(Field).filter(Field.user_id == current_user.id).all()
-    
-    # Fetch all thumbnails for these fields in one query
-    field_ids = [field.id for field in fields]
-    thumbnails = db.query(FieldThumbnail).filter(FieldThumbnail.field_id.in_(field_ids)).all()
-    thumbnail_map = {str(t.field_id): t.image_data for t in thumbnails}
-    
-    # Build response with thumbnails included
-    result = []
-    for field in fields:
-        field_dict = {
-            "id": field.id,
-            "user_id": field.user_id,
-            "name": field.name,
-            "crop_type": field.crop_type,
-            "variety": field.variety,
-            "planting_season": field.planting_season,
-            "planting_date": field.planting_date,
-            "geometry": field.geometry,
-            "area_m2": field.area_m2,
-            "centroid_lat": field.centroid_lat,
-            "centroid_lng": field.centroid_lng,
-            "address": field.address,
-            "address_en": field.address_en,
-            "thumbnail": thumbnail_map.get(str(field.id)),
-            "created_at": field.created_at,
-        }
-        result.append(FieldResponse(**field_dict))
+    fields = db.query(Field).options(
+        selectinload(Field.thumbnail_record).undefer(FieldThumbnail.image_data)
+    ).filter(Field.user_id == current_user.id).all()
     
-    return result
+    # Returned as ORM rows: FastAPI validates them against response_model once
+    # (from_attributes), rather than dumping and re-validating prebuilt models
+    return fields
 
 @router.get("/{field_id}", response_model=FieldResponse)
-def get_field(field_id: UUID, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_field(field_id: UUID, current_user: UserResponse = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get a specific field"""
-    field = db.query(Field).filter(
-        Field.id == field_id,
-        Field.user_id == current_user.id
-    ).first()
+    field = db.get(Field, field_id)
     
-    if not field:
+    if not field or field.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Field not found"
         )
     
-    return FieldResponse.model_validate(field)
+    return field
 
 @router.put("/{field_id}", response_model=FieldResponse)
 def update_field(
     field_id: UUID,
     field_data: FieldUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Update a field"""
-    field = db.query(Field).filter(
-        Field.id == field_id,
-        Field.user_id == current_user.id
-    ).first()
+    field = db.get(Field, field_id)
     
-    if not field:
+    if not field or field.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Field not found"
@@ -166,13 +238,13 @@ def update_field(
     db.commit()
     db.refresh(field)
     
-    return FieldResponse.model_validate(field)
+    return field
 
 @router.delete("/{field_id}")
-def delete_field(field_id: UUID, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def delete_field(field_id: UUID, current_user: UserResponse = Depends(get_current_user), db: Session = Depends(get_db)):
     """Delete a field"""
     try:
-        field = db.query(Field).filter(
+        field = db.query(Field.id).filter(
             Field.id == field_id,
             Field.user_id == current_user.id
         ).first()
@@ -183,29 +255,26 @@ def delete_field(field_id: UUID, current_user: User = Depends(get_current_user),
                 detail="Field not found"
             )
         
-        # ลบ thumbnails ที่เกี่ยวข้องก่อน
-        from models import FieldThumbnail
-        thumbnails = db.query(FieldThumbnail).filter(FieldThumbnail.field_id == field_id).all()
-        for thumbnail in thumbnails:
-            db.delete(thumbnail)
+        # ลบข้อมูลที่เกี่ยวข้องก่อน - Core DELETEs in the session's single
+        # transaction; nothing is loaded, so skip the identity-map sync
+        from models import VISnapshot, VITimeSeries, AnalysisJob
+        no_sync = {"synchronize_session": False}
+        for model in (FieldThumbnail, VISnapshot, VITimeSeries, AnalysisJob):
+            db.execute(delete(model).where(model.field_id == field_id), execution_options=no_sync)
         
-        from models import VISnapshot, VITimeSeries
-        snapshots = db.query(VISnapshot).filter(VISnapshot.field_id == field_id).all()
-        for snapshot in snapshots:
-            db.delete(snapshot)
-            
-        timeseries = db.query(VITimeSeries).filter(VITimeSeries.field_id == field_id).all()
-        for ts in timeseries:
-            db.delete(ts)
-        
-        db.delete(field)
+        db.execute(
+            delete(Field).where(Field.id == field_id, Field.user_id == current_user.id),
+            execution_options=no_sync,
+        )
         db.commit()
         
         return {"message": "Field deleted successfully"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
-        print(f"Error deleting field: {e}")
+        logger.exception("Error deleting field %s", field_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete field: {str(e)}"
@@ -215,91 +284,105 @@ def delete_field(field_id: UUID, current_user: User = Depends(get_current_user),
 def save_field_thumbnail(
     field_id: UUID,
     thumbnail_data: ThumbnailCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Save field thumbnail"""
-    field = db.query(Field).filter(
-        Field.id == field_id,
-        Field.user_id == current_user.id
-    ).first()
+    # Ownership check and upsert in one statement: INSERT ... SELECT from the
+    # caller's field, so nothing is written (and no row returned) otherwise
+    now = datetime.utcnow()
+    owned_field = select(
+        literal(uuid4(), FieldThumbnail.id.type),
+        Field.id,
+        literal(thumbnail_data.image_data, Text),
+        literal(now, DateTime),
+    ).where(Field.id == field_id, Field.user_id == current_user.id)
+    stmt = pg_insert(FieldThumbnail).from_select(
+        ["id", "field_id", "image_data", "created_at"], owned_field
+    ).on_conflict_do_update(
+        index_elements=[FieldThumbnail.field_id],
+        set_={"image_data": thumbnail_data.image_data, "created_at": now},
+    ).returning(FieldThumbnail.id)
+    thumbnail_id = db.execute(stmt).scalar_one_or_none()
     
-    if not field:
+    if thumbnail_id is None:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Field not found"
         )
+    db.commit()
     
-    existing_thumbnail = db.query(FieldThumbnail).filter(
-        FieldThumbnail.field_id == field_id
-    ).first()
-    
-    if existing_thumbnail:
-        db.delete(existing_thumbnail)
-    
-    db_thumbnail = FieldThumbnail(
+    return ThumbnailResponse(
+        id=thumbnail_id,
         field_id=field_id,
-        image_data=thumbnail_data.image_data
+        image_data=thumbnail_data.image_data,
+        created_at=now,
     )
-    
-    db.add(db_thumbnail)
-    db.commit()
-    db.refresh(db_thumbnail)
-    
-    return ThumbnailResponse.model_validate(db_thumbnail)
 
 @router.get("/{field_id}/thumbnail")
 def get_field_thumbnail(
     field_id: UUID,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get field thumbnail"""
-    field = db.query(Field).filter(
+    # Ownership and thumbnail in one round trip
+    thumbnail = db.query(Field.id, FieldThumbnail.image_data).outerjoin(
+        FieldThumbnail, FieldThumbnail.field_id == Field.id
+    ).filter(
         Field.id == field_id,
         Field.user_id == current_user.id
     ).first()
     
-    if not field:
+    if not thumbnail:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Field not found"
         )
     
-    thumbnail = db.query(FieldThumbnail).filter(
-        FieldThumbnail.field_id == field_id
-    ).first()
-    
-    if not thumbnail:
+    if thumbnail.image_data is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Thumbnail not found"
         )
     
-    return {"image_data": thumbnail.image_data}
+    # Thumbnails are replaced in place, so clients revalidate every time and
+    # get a bodyless 304 while the image is unchanged
+    etag = '"' + hashlib.blake2b(thumbnail.image_data.encode(), digest_size=8).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return ORJSONResponse({"image_data": thumbnail.image_data}, headers=headers)
+
+def _first_feature_geometry(fileobj) -> Optional[dict]:
+    """Geometry of the first feature in a GeoJSON FeatureCollection, or None"""
+    for geometry in ijson.items(fileobj, "features.item.geometry", use_float=True):
+        return geometry
+    return None
 
 @router.post("/import")
 async def import_field(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Import field from file (SHP, KML, GeoJSON, GPKG)"""
     try:
-        content = await file.read()
-        
         if file.filename.endswith('.geojson'):
-            geojson_data = json.loads(content.decode('utf-8'))
+            # The upload is already spooled to a temp file; parse it incrementally
+            # and stop at the first geometry instead of loading the whole document
+            geometry = await run_in_threadpool(_first_feature_geometry, file.file)
             
-            if 'features' in geojson_data and len(geojson_data['features']) > 0:
-                geometry = geojson_data['features'][0]['geometry']
-                
+            if geometry is not None:
                 field_data = FieldCreate(
                     name="แปลงนำเข้า",
                     geometry=geometry
                 )
                 
-                return create_field(field_data, current_user, db)
+                return await create_field(field_data, current_user, db)
         
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -307,17 +390,44 @@ async def import_field(
         )
         
     except Exception as e:
-        print(f"Error importing field: {e}")
+        logger.exception("Error importing field")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to import field"
         )
 
+def _wkt_num(value) -> str:
+    # Shortest round-trip repr, with integral values trimmed like GEOS does
+    text = repr(float(value))
+    return text[:-2] if text.endswith(".0") else text
+
+def _wkt_ring(ring) -> str:
+    return "(" + ", ".join([f"{_wkt_num(pt[0])} {_wkt_num(pt[1])}" for pt in ring]) + ")"
+
+def _wkt_polygon(rings) -> str:
+    return "(" + ", ".join([_wkt_ring(ring) for ring in rings]) + ")"
+
+def _geojson_to_wkt(geometry: dict) -> str:
+    """WKT for a GeoJSON geometry, formatted directly for (multi)polygons"""
+    geom_type = geometry.get("type")
+    if geom_type == "Polygon":
+        return "POLYGON " + _wkt_polygon(geometry["coordinates"])
+    if geom_type == "MultiPolygon":
+        return "MULTIPOLYGON (" + ", ".join([_wkt_polygon(p) for p in geometry["coordinates"]]) + ")"
+    return shape(geometry).wkt
+
+# (field_id, format, updated_at) -> (body, media_type, headers) for text exports
+_export_cache = TTLCache(maxsize=512, ttl=3600)
+
+def _cached_export_response(cache_key, content: bytes, media_type: str, headers: dict) -> Response:
+    _export_cache.set(cache_key, (content, media_type, headers))
+    return Response(content=content, media_type=media_type, headers=headers)
+
 @router.get("/{field_id}/export/{format}")
 def export_field(
     field_id: UUID,
     format: str,
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Export field in specified format (geojson, kml, csv, shp, gpkg)
@@ -327,12 +437,9 @@ def export_field(
     - csv: downloads a .csv (UTF-8 BOM) with WKT geometry
     - shp/gpkg: not implemented -> 501
     """
-    field = db.query(Field).filter(
-        Field.id == field_id,
-        Field.user_id == current_user.id
-    ).first()
+    field = db.get(Field, field_id)
     
-    if not field:
+    if not field or field.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Field not found"
@@ -340,6 +447,13 @@ def export_field(
     
     fmt = format.lower()
 
+    # Text exports only change when the field does; serve repeats from memory
+    cache_key = (field.id, fmt, field.updated_at)
+    cached = _export_cache.get(cache_key)
+    if cached is not None:
+        content, media_type, headers = cached
+        return Response(content=content, media_type=media_type, headers=headers)
+
     feature = {
         "type": "Feature",
         "geometry": field.geometry,
@@ -356,17 +470,17 @@ def export_field(
             "type": "FeatureCollection",
             "features": [feature],
         }
-        content = json.dumps(geojson, ensure_ascii=False, indent=2)
+        content = orjson.dumps(geojson, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
         headers = {
             "Content-Disposition": f"attachment; filename=field_{field.id}.geojson"
         }
-        return Response(content=content, media_type="application/geo+json; charset=utf-8", headers=headers)
+        return _cached_export_response(cache_key, content, "application/geo+json; charset=utf-8", headers)
 
     if fmt == 'kml':
         try:
             geom = feature["geometry"]
             def coord_pairs(coords):
-                return " ".join([f"{lng},{lat},0" for lng, lat in coords])
+                return " ".join(map(_KML_COORD_FORMAT, coords))
 
             polygons = []
             if geom["type"] == "Polygon":
@@ -374,35 +488,34 @@ def export_field(
             elif geom["type"] == "MultiPolygon":
                 polygons = geom["coordinates"]
 
-            placemarks = []
-            for idx, rings in enumerate(polygons):
-                outer = rings[0] if rings else []
-                coords = coord_pairs(outer)
-                name_suffix = f" {idx+1}" if len(polygons) > 1 else ""
-                placemarks.append(
-                    f"\n    <Placemark>\n      <name>{field.name}{name_suffix}</name>\n      <ExtendedData>\n        <Data name=\"crop_type\"><value>{field.crop_type or ''}</value></Data>\n        <Data name=\"area_m2\"><value>{field.area_m2}</value></Data>\n        <Data name=\"planting_date\"><value>{feature['properties']['planting_date'] or ''}</value></Data>\n      </ExtendedData>\n      <Style><LineStyle><color>ff2b7a4b</color><width>2</width></LineStyle><PolyStyle><color>1a2b7a4b</color></PolyStyle></Style>\n      <Polygon>\n        <outerBoundaryIs><LinearRing><coordinates>{coords}</coordinates></LinearRing></outerBoundaryIs>\n      </Polygon>\n    </Placemark>"
+            # Field-level values are escaped once and shared by every placemark
+            name_esc = xml_escape(field.name or "")
+            extended_data = _KML_EXTENDED_DATA_TMPL.substitute(
+                crop_type=xml_escape(field.crop_type or ""),
+                area_m2=field.area_m2,
+                planting_date=feature["properties"]["planting_date"] or "",
+            )
+            multiple = len(polygons) > 1
+            placemarks = [
+                _KML_PLACEMARK_TMPL.substitute(
+                    name=f"{name_esc} {idx+1}" if multiple else name_esc,
+                    extended_data=extended_data,
+                    coords=coord_pairs(rings[0] if rings else []),
                 )
+                for idx, rings in enumerate(polygons)
+            ]
 
-            kml = (
-                "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
-                "<kml xmlns=\"http://www.opengis.net/kml/2.2\">\n"
-                "  <Document>\n"
-                f"    <name>{field.name}</name>" + "".join(placemarks) + "\n"
-                "  </Document>\n"
-                "</kml>"
-            )
+            kml = _KML_DOCUMENT_TMPL.substitute(name=name_esc, placemarks="".join(placemarks))
             headers = {
                 "Content-Disposition": f"attachment; filename=field_{field.id}.kml"
             }
-            return Response(content=kml, media_type="application/vnd.google-earth.kml+xml; charset=utf-8", headers=headers)
+            return _cached_export_response(cache_key, kml.encode("utf-8"), "application/vnd.google-earth.kml+xml; charset=utf-8", headers)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to export KML: {e}")
 
     if fmt == 'csv':
         try:
-            from shapely.geometry import shape as shp_shape
-            geom = shp_shape(feature["geometry"])  
-            wkt = geom.wkt
+            wkt = _geojson_to_wkt(feature["geometry"])
             headers_row = ["name","crop_type","area_m2","planting_date","wkt"]
             row = [
                 feature["properties"]["name"] or "",
@@ -418,7 +531,7 @@ def export_field(
             headers = {
                 "Content-Disposition": f"attachment; filename=field_{field.id}.csv"
             }
-            return Response(content=csv_content, media_type="text/csv; charset=utf-8", headers=headers)
+            return _cached_export_response(cache_key, csv_content.encode("utf-8"), "text/csv; charset=utf-8", headers)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to export CSV: {e}")
 
@@ -435,16 +548,22 @@ def export_field(
             geojson = {"type": "FeatureCollection", "features": [feature]}
             gdf = gpd.GeoDataFrame.from_features(geojson["features"], crs="EPSG:4326")
 
-            with tempfile.TemporaryDirectory() as tmpdir:
+            # Written to disk and streamed with FileResponse instead of being read
+            # into memory; the temp dir is removed once the response has been sent
+            tmpdir = tempfile.mkdtemp()
+            cleanup = BackgroundTask(shutil.rmtree, tmpdir, ignore_errors=True)
+            try:
                 if fmt == "gpkg":
                     base = (field.name or "field").encode("ascii", "ignore").decode() or f"field_{str(field.id)[:8]}"
                     base = base.replace(" ", "_")
                     out_path = os.path.join(tmpdir, f"{base}.gpkg")
                     gdf.to_file(out_path, driver="GPKG", layer="field")
-                    with open(out_path, "rb") as f:
-                        data = f.read()
-                    headers = {"Content-Disposition": f"attachment; filename={os.path.basename(out_path)}"}
-                    return Response(content=data, media_type="application/geopackage+sqlite3", headers=headers)
+                    return FileResponse(
+                        out_path,
+                        media_type="application/geopackage+sqlite3",
+                        filename=os.path.basename(out_path),
+                        background=cleanup,
+                    )
 
                 shp_dir = os.path.join(tmpdir, "shp")
                 os.makedirs(shp_dir, exist_ok=True)
@@ -457,14 +576,20 @@ def export_field(
                 shp_path = os.path.join(shp_dir, f"{base_ascii}.shp")
                 gdf.to_file(shp_path, driver="ESRI Shapefile")
 
-                mem_file = io.BytesIO()
-                with zipfile.ZipFile(mem_file, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+                zip_path = os.path.join(tmpdir, f"{base_ascii}.zip")
+                with zipfile.ZipFile(zip_path, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
                     for fn in os.listdir(shp_dir):
                         full = os.path.join(shp_dir, fn)
                         zf.write(full, arcname=fn)
-                mem_file.seek(0)
-                headers = {"Content-Disposition": f"attachment; filename={base_ascii}.zip"}
-                return Response(content=mem_file.read(), media_type="application/zip", headers=headers)
+                return FileResponse(
+                    zip_path,
+                    media_type="application/zip",
+                    filename=f"{base_ascii}.zip",
+                    background=cleanup,
+                )
+            except Exception:
+                shutil.rmtree(tmpdir, ignore_errors=True)
+                raise
         except Exception as e:
             return JSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,16 +1,29 @@
-from typing import List, Dict, Any, Optional
-from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
+from typing import List, Dict, Any, Optional, Set
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
 import asyncio
-import json
+import gzip
+import hashlib
+import logging
+import orjson
+import msgspec
 import time
 import psutil
 import subprocess
 import os
 from datetime import datetime, timedelta
 import random
+from collections import deque
+from itertools import islice
 
-router = APIRouter(prefix="/tunnel", tags=["tunnel"])
+try:
+    import brotli
+except ImportError:  # optional: the dashboard falls back to gzip
+    brotli = None
+
+logger = logging.getLogger("grovi.tunnel")
+
+router = APIRouter(prefix="/tunnel", tags=["tunnel"], default_response_class=ORJSONResponse)
 
 # In-memory storage for tunnel data
 tunnel_data = {
@@ -29,54 +42,73 @@ tunnel_data = {
         "p50": 0.47,
         "p90": 5.53
     },
-    "http_requests": []
+    # Newest first, bounded: appendleft drops the oldest entry past 50
+    "http_requests": deque(maxlen=50)
 }
 
 # WebSocket connections for real-time updates
-websocket_connections: List[WebSocket] = []
+websocket_connections: Set[WebSocket] = set()
+
+# Clients connecting with ?format=msgpack get binary MessagePack frames;
+# everyone else (including the dashboard page) gets JSON text frames
+_msgpack_encoder = msgspec.msgpack.Encoder()
+
+def _encode_message(update_data: dict, binary: bool):
+    if binary:
+        return _msgpack_encoder.encode(update_data)
+    return orjson.dumps(update_data).decode()
+
+async def _send_encoded(websocket: WebSocket, payload) -> None:
+    if isinstance(payload, bytes):
+        await websocket.send_bytes(payload)
+    else:
+        await websocket.send_text(payload)
+
+SAMPLE_PATHS = (
+    "/",
+    "/api/health",
+    "/api/fields",
+    "/api/auth/login",
+    "/api/vi-analysis",
+    "/static/css/main.css",
+    "/static/js/app.js",
+    "/favicon.ico",
+    "/api/fields/123",
+    "/api/images/456",
+)
+SAMPLE_STATUS_CODES = (200, 200, 200, 200, 200, 200, 200, 404, 200, 200)
 
 class TunnelManager:
     def __init__(self):
         self.request_counter = 0
-        self.start_time = time.time()
+        self.start_time = time.monotonic()  # wall-clock jumps must not skew uptime
+        # All psutil readings are taken together and reused for one sampling window
+        self._sample_interval = 1.0
+        self._sample_ts = 0.0
+        self._sample = None
+        psutil.cpu_percent(interval=None)  # prime the delta for the first reading
     
-    def generate_sample_requests(self):
+    def generate_sample_requests(self, count: int = 5):
         """Generate sample HTTP requests for demo"""
-        sample_paths = [
-            "/",
-            "/api/health",
-            "/api/fields",
-            "/api/auth/login",
-            "/api/vi-analysis",
-            "/static/css/main.css",
-            "/static/js/app.js",
-            "/favicon.ico",
-            "/api/fields/123",
-            "/api/images/456"
-        ]
-        
-        status_codes = [200, 200, 200, 200, 200, 200, 200, 404, 200, 200]
+        # Each field is drawn for the whole batch at once; the batch shares one timestamp
+        paths = random.choices(SAMPLE_PATHS, k=count)
+        statuses = random.choices(SAMPLE_STATUS_CODES, k=count)
+        timestamp = datetime.now().isoformat()
+        first_id = self.request_counter
         
-        for i in range(5):  # Generate 5 sample requests
-            path = random.choice(sample_paths)
-            status = random.choice(status_codes)
-            
-            request = {
-                "id": self.request_counter,
+        tunnel_data["http_requests"].extendleft(
+            {
+                "id": first_id + i,
                 "method": "GET",
                 "path": path,
                 "status": status,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": timestamp,
                 "response_time": round(random.uniform(0.01, 2.0), 3),
                 "size": random.randint(100, 50000)
             }
-            
-            tunnel_data["http_requests"].insert(0, request)
-            self.request_counter += 1
-            
-            # Keep only last 50 requests
-            if len(tunnel_data["http_requests"]) > 50:
-                tunnel_data["http_requests"] = tunnel_data["http_requests"][:50]
+            for i, (path, status) in enumerate(zip(paths, statuses))
+        )
+        self.request_counter += count
     
     def update_connections_stats(self):
         """Update connection statistics"""
@@ -91,24 +123,26 @@ class TunnelManager:
     def get_system_stats(self):
         """Get system statistics"""
         try:
-            # Get CPU and memory usage
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            
-            # Get network stats
-            network = psutil.net_io_counters()
+            now = time.monotonic()
+            
+            # Sample at most once per window however many clients ask; CPU usage is
+            # measured since the previous sample, so this never blocks (unlike interval=1)
+            if self._sample is None or now - self._sample_ts >= self._sample_interval:
+                memory = psutil.virtual_memory()
+                network = psutil.net_io_counters()
+                self._sample = {
+                    "cpu_percent": psutil.cpu_percent(interval=None),
+                    "memory_percent": memory.percent,
+                    "memory_used": memory.used,
+                    "memory_total": memory.total,
+                    "bytes_sent": network.bytes_sent,
+                    "bytes_recv": network.bytes_recv,
+                }
+                self._sample_ts = now
             
-            return {
-                "cpu_percent": cpu_percent,
-                "memory_percent": memory.percent,
-                "memory_used": memory.used,
-                "memory_total": memory.total,
-                "bytes_sent": network.bytes_sent,
-                "bytes_recv": network.bytes_recv,
-                "uptime": time.time() - self.start_time
-            }
-        except Exception as e:
-            print(f"Error getting system stats: {e}")
+            return {**self._sample, "uptime": now - self.start_time}
+        except Exception:
+            logger.exception("Error getting system stats")
             return {
                 "cpu_percent": 0,
                 "memory_percent": 0,
@@ -116,38 +150,51 @@ class TunnelManager:
                 "memory_total": 0,
                 "bytes_sent": 0,
                 "bytes_recv": 0,
-                "uptime": time.time() - self.start_time
+                "uptime": time.monotonic() - self.start_time
             }
 
+    async def get_system_stats_async(self):
+        """get_system_stats, with fresh psutil samples taken off the event loop"""
+        if self._sample is not None and time.monotonic() - self._sample_ts < self._sample_interval:
+            return self.get_system_stats()  # cached: no /proc access
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_system_stats)
+
 tunnel_manager = TunnelManager()
 
-@router.get("/status")
-async def get_tunnel_status():
-    """Get current tunnel status"""
+async def _status_snapshot():
     tunnel_manager.update_connections_stats()
-    system_stats = tunnel_manager.get_system_stats()
+    system_stats = await tunnel_manager.get_system_stats_async()
     
     return {
         **tunnel_data,
+        "http_requests": list(tunnel_data["http_requests"]),
         "system_stats": system_stats,
-        "last_updated": datetime.now().isoformat()
+        "last_updated": datetime.now()
     }
 
+@router.get("/status")
+async def get_tunnel_status():
+    """Get current tunnel status"""
+    # Returned as a response so FastAPI skips jsonable_encoder; orjson
+    # serializes the snapshot (datetimes included) directly
+    return ORJSONResponse(await _status_snapshot())
+
 @router.get("/requests")
 async def get_http_requests():
     """Get HTTP requests log"""
-    return {
-        "requests": tunnel_data["http_requests"],
+    return ORJSONResponse({
+        "requests": list(tunnel_data["http_requests"]),
         "total": len(tunnel_data["http_requests"])
-    }
+    })
 
 @router.post("/simulate-request")
 async def simulate_http_request():
     """Simulate a new HTTP request for demo purposes"""
     tunnel_manager.generate_sample_requests()
     
-    # Notify all WebSocket connections
-    await broadcast_update()
+    # Notify all WebSocket connections (coalesced, see _request_update_loop)
+    _request_update_pending.set()
+    _ensure_request_updater()
     
     return {"message": "Request simulated", "total_requests": len(tunnel_data["http_requests"])}
 
@@ -155,63 +202,142 @@ async def simulate_http_request():
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time updates"""
     await websocket.accept()
-    websocket_connections.append(websocket)
+    websocket.state.msgpack = websocket.query_params.get("format") == "msgpack"
+    websocket.state.outbox = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+    writer = asyncio.create_task(_client_writer(websocket))
+    websocket_connections.add(websocket)
+    _ensure_stats_ticker()
+    
+    # Full status as the first message, so the dashboard doesn't need a
+    # separate /status round trip on load
+    _enqueue(websocket, _encode_message({"type": "snapshot", "data": await _status_snapshot()}, websocket.state.msgpack))
     
     try:
+        # Updates are pushed by the shared ticker; this only waits for the
+        # client to go away (incoming messages are ignored)
         while True:
-            # Send periodic updates
-            await asyncio.sleep(2)
-            
-            # Update stats
-            tunnel_manager.update_connections_stats()
-            system_stats = tunnel_manager.get_system_stats()
-            
-            update_data = {
-                "type": "stats_update",
-                "data": {
-                    "connections": tunnel_data["connections"],
-                    "system_stats": system_stats,
-                    "timestamp": datetime.now().isoformat()
-                }
-            }
-            
-            await websocket.send_text(json.dumps(update_data))
+            await websocket.receive_text()
             
     except WebSocketDisconnect:
-        websocket_connections.remove(websocket)
-    except Exception as e:
-        print(f"WebSocket error: {e}")
-        if websocket in websocket_connections:
-            websocket_connections.remove(websocket)
+        pass
+    except Exception:
+        logger.exception("WebSocket error")
+    finally:
+        websocket_connections.discard(websocket)
+        writer.cancel()
+
+# Each client has a bounded outbox drained by its own writer task, so a slow
+# client only ever holds CLIENT_QUEUE_SIZE pending messages and never delays others
+CLIENT_QUEUE_SIZE = 16
+
+async def _client_writer(websocket: WebSocket):
+    outbox = websocket.state.outbox
+    try:
+        while True:
+            await _send_encoded(websocket, await outbox.get())
+    except Exception:
+        websocket_connections.discard(websocket)
+
+def _enqueue(websocket: WebSocket, payload) -> None:
+    """Queue a message for a client, dropping its oldest pending one if full"""
+    outbox = websocket.state.outbox
+    try:
+        outbox.put_nowait(payload)
+    except asyncio.QueueFull:
+        outbox.get_nowait()
+        outbox.put_nowait(payload)
+
+STATS_TICK_SECONDS = 2
+_stats_ticker: Optional[asyncio.Task] = None
+
+def _ensure_stats_ticker():
+    """Start the shared stats ticker if it isn't running"""
+    global _stats_ticker
+    if _stats_ticker is None or _stats_ticker.done():
+        _stats_ticker = asyncio.create_task(_stats_ticker_loop())
+
+async def _stats_ticker_loop():
+    """Sample stats once per tick and push them to every client; exits when none are left"""
+    while websocket_connections:
+        await asyncio.sleep(STATS_TICK_SECONDS)
+        if not websocket_connections:
+            break
+        
+        # Update stats
+        tunnel_manager.update_connections_stats()
+        system_stats = await tunnel_manager.get_system_stats_async()
+        
+        await _broadcast({
+            "type": "stats_update",
+            "data": {
+                "connections": tunnel_data["connections"],
+                "system_stats": system_stats,
+                "timestamp": datetime.now()  # both encoders handle datetimes natively
+            }
+        })
+
+# Bursts of simulated requests collapse into at most one request_update
+# broadcast per REQUEST_UPDATE_INTERVAL, however fast they arrive
+REQUEST_UPDATE_INTERVAL = 0.1
+_request_update_pending = asyncio.Event()
+_request_updater: Optional[asyncio.Task] = None
+
+def _ensure_request_updater():
+    """Start the request_update coalescing task if it isn't running"""
+    global _request_updater
+    if _request_updater is None or _request_updater.done():
+        _request_updater = asyncio.create_task(_request_update_loop())
+
+async def _request_update_loop():
+    while True:
+        await _request_update_pending.wait()
+        _request_update_pending.clear()
+        await broadcast_update()
+        await asyncio.sleep(REQUEST_UPDATE_INTERVAL)
+
+# Encoded request_update frames per wire format; the request log only changes
+# when request_counter moves, so until then the same frames are resent as is
+_request_update_counter = -1
+_request_update_payloads: Dict[bool, Any] = {}
 
 async def broadcast_update():
     """Broadcast update to all WebSocket connections"""
+    global _request_update_counter
     if not websocket_connections:
         return
     
-    update_data = {
-        "type": "request_update",
-        "data": {
-            "requests": tunnel_data["http_requests"][:10],  # Send only latest 10
-            "total": len(tunnel_data["http_requests"])
-        }
-    }
+    if _request_update_counter != tunnel_manager.request_counter:
+        _request_update_counter = tunnel_manager.request_counter
+        _request_update_payloads.clear()
     
-    disconnected = []
-    for websocket in websocket_connections:
-        try:
-            await websocket.send_text(json.dumps(update_data))
-        except:
-            disconnected.append(websocket)
+    missing = {websocket.state.msgpack for websocket in websocket_connections} - _request_update_payloads.keys()
+    if missing:
+        update_data = {
+            "type": "request_update",
+            "data": {
+                "requests": list(islice(tunnel_data["http_requests"], 10)),  # Send only latest 10
+                "total": len(tunnel_data["http_requests"])
+            }
+        }
+        for binary in missing:
+            _request_update_payloads[binary] = _encode_message(update_data, binary)
     
-    # Remove disconnected connections
-    for websocket in disconnected:
-        websocket_connections.remove(websocket)
+    _deliver(_request_update_payloads)
 
-@router.get("/dashboard", response_class=HTMLResponse)
-async def tunnel_dashboard():
-    """Serve the tunnel dashboard HTML page"""
-    html_content = """
+async def _broadcast(update_data: dict):
+    # Serialized at most once per wire format, not once per client
+    payloads = {}
+    for binary in {websocket.state.msgpack for websocket in websocket_connections}:
+        payloads[binary] = _encode_message(update_data, binary)
+    _deliver(payloads)
+
+def _deliver(payloads: Dict[bool, Any]) -> None:
+    # Hand off to each client's writer; failed clients are removed by their writer
+    for websocket in list(websocket_connections):
+        _enqueue(websocket, payloads[websocket.state.msgpack])
+
+# Static page: encoded and hashed once at import instead of per request
+_DASHBOARD_HTML = """
     <!DOCTYPE html>
     <html lang="th">
     <head>
@@ -598,6 +724,7 @@ async def tunnel_dashboard():
         <script>
             let ws = null;
             let reconnectInterval = null;
+            let initialLoaded = false;
             
             function connectWebSocket() {
                 const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
@@ -615,7 +742,9 @@ async def tunnel_dashboard():
                 
                 ws.onmessage = function(event) {
                     const data = JSON.parse(event.data);
-                    if (data.type === 'stats_update') {
+                    if (data.type === 'snapshot') {
+                        applyStatus(data.data);
+                    } else if (data.type === 'stats_update') {
                         updateStats(data.data);
                     } else if (data.type === 'request_update') {
                         updateRequests(data.data.requests);
@@ -624,6 +753,10 @@ async def tunnel_dashboard():
                 
                 ws.onclose = function() {
                     console.log('WebSocket disconnected');
+                    // No socket snapshot arrived: fall back to the HTTP status endpoint
+                    if (!initialLoaded) {
+                        loadInitialData();
+                    }
                     if (!reconnectInterval) {
                         reconnectInterval = setInterval(connectWebSocket, 5000);
                     }
@@ -713,39 +846,85 @@ async def tunnel_dashboard():
                 }
             }
             
+            function applyStatus(data) {
+                initialLoaded = true;
+                
+                // Update session status
+                document.getElementById('account').textContent = data.account;
+                document.getElementById('version').textContent = data.version;
+                document.getElementById('region').textContent = data.region;
+                document.getElementById('latency').textContent = data.latency;
+                document.getElementById('web-interface').textContent = data.web_interface;
+                document.getElementById('forwarding').textContent = data.forwarding;
+                
+                // Update initial stats
+                updateStats(data);
+                
+                // Update initial requests
+                if (data.http_requests) {
+                    updateRequests(data.http_requests.slice(0, 10));
+                }
+            }
+            
             async function loadInitialData() {
                 try {
                     const response = await fetch('/tunnel/status');
-                    const data = await response.json();
-                    
-                    // Update session status
-                    document.getElementById('account').textContent = data.account;
-                    document.getElementById('version').textContent = data.version;
-                    document.getElementById('region').textContent = data.region;
-                    document.getElementById('latency').textContent = data.latency;
-                    document.getElementById('web-interface').textContent = data.web_interface;
-                    document.getElementById('forwarding').textContent = data.forwarding;
-                    
-                    // Update initial stats
-                    updateStats(data);
-                    
-                    // Update initial requests
-                    if (data.http_requests) {
-                        updateRequests(data.http_requests.slice(0, 10));
-                    }
-                    
+                    applyStatus(await response.json());
                 } catch (error) {
                     console.error('Error loading initial data:', error);
                 }
             }
             
-            // Initialize
+            // Initialize; the status snapshot arrives as the socket's first message
             document.addEventListener('DOMContentLoaded', function() {
-                loadInitialData();
                 connectWebSocket();
             });
         </script>
     </body>
     </html>
     """
-    return HTMLResponse(content=html_content)
+
+def _minify_dashboard(html: str) -> bytes:
+    """Drop indentation, blank lines and whole-line // comments from the page
+
+    Line breaks are kept so JS automatic semicolon insertion still applies.
+    """
+    lines = (line.strip() for line in html.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith("//")).encode("utf-8")
+
+_DASHBOARD_HTML = _minify_dashboard(_DASHBOARD_HTML)
+_DASHBOARD_DIGEST = hashlib.blake2b(_DASHBOARD_HTML, digest_size=8).hexdigest()
+
+def _dashboard_variant(body: bytes, encoding: Optional[str]):
+    """(body, headers) for one pre-compressed variant; each gets its own ETag"""
+    headers = {
+        "ETag": f'"{_DASHBOARD_DIGEST}{"-" + encoding if encoding else ""}"',
+        "Cache-Control": "public, max-age=3600",
+        "Vary": "Accept-Encoding",
+    }
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return body, headers
+
+# Compressed once at import, so serving a compressed page costs no CPU per request
+_DASHBOARD_VARIANTS = {
+    None: _dashboard_variant(_DASHBOARD_HTML, None),
+    "gzip": _dashboard_variant(gzip.compress(_DASHBOARD_HTML, 9), "gzip"),
+}
+if brotli is not None:
+    _DASHBOARD_VARIANTS["br"] = _dashboard_variant(brotli.compress(_DASHBOARD_HTML, quality=11), "br")
+
+def _preferred_encoding(accept_encoding: str) -> Optional[str]:
+    offered = {token.split(";")[0].strip() for token in accept_encoding.lower().split(",")}
+    for encoding in ("br", "gzip"):
+        if encoding in offered and encoding in _DASHBOARD_VARIANTS:
+            return encoding
+    return None
+
+@router.get("/dashboard", response_class=HTMLResponse)
+async def tunnel_dashboard(request: Request):
+    """Serve the tunnel dashboard HTML page"""
+    body, headers = _DASHBOARD_VARIANTS[_preferred_encoding(request.headers.get("accept-encoding", ""))]
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content=body, headers=headers)
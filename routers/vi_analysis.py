@@ -1,38 +1,113 @@
 from typing import List, Optional
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-from core.database import get_db
-from models import User, Field, VISnapshot, VITimeSeries
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Request, Response
+from sqlalchemy import extract, func, select, update
+from sqlalchemy.orm import Session, undefer
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from core.database import get_db, SessionLocal
+from models import Field, VISnapshot, VITimeSeries, AnalysisJob
 from schemas import (
     VIAnalysisRequest, VIOverlayRequest, VIOverlayResponse,
     VISnapshotCreate, VISnapshotResponse,
-    VITimeSeriesCreate, VITimeSeriesResponse
+    VITimeSeriesCreate, VITimeSeriesResponse,
+    AnalysisJobResponse, UserResponse
 )
 from core.auth import get_current_user
+from core.rate_limit import limiter
+from core.cache import TTLCache
 from services import gee_service
 from uuid import UUID
-
-# Rate limiting
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-
-limiter = Limiter(key_func=get_remote_address)
+from pydantic import TypeAdapter
+import hashlib
+import logging
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 
 router = APIRouter(prefix="/vi-analysis", tags=["vegetation-indices"])
 vi_router = APIRouter(prefix="/vi", tags=["vegetation-indices-compat"])
 
-@vi_router.get("/timeseries/{field_id}")
-async def get_vi_timeseries_compat(
+logger = logging.getLogger("grovi.vi_analysis")
+
+# Upper bound on concurrent GEE requests issued by a single bulk analysis
+GEE_MAX_PARALLEL_CALLS = 8
+
+# List endpoints read plain Core rows (no ORM identity map or instance state)
+# and validate the whole list in one call
+_SNAPSHOT_RESPONSE_COLUMNS = [VISnapshot.__table__.c[name] for name in VISnapshotResponse.model_fields]
+_snapshots_adapter = TypeAdapter(List[VISnapshotResponse])
+_timeseries_adapter = TypeAdapter(List[VITimeSeriesResponse])
+
+# A GEE analysis can take many seconds, and its result for the same geometry,
+# index and day doesn't change, so results are kept per worker for a day
+GEE_CACHE_TTL_SECONDS = 24 * 3600
+_gee_stats_cache = TTLCache(maxsize=4096, ttl=GEE_CACHE_TTL_SECONDS)
+_gee_overlay_cache = TTLCache(maxsize=256, ttl=GEE_CACHE_TTL_SECONDS)  # base64 PNGs, so fewer entries
+
+def _gee_cache_key(geometry: dict, vi_type: str, date: datetime) -> tuple:
+    geometry_digest = hashlib.blake2b(orjson.dumps(geometry, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+    return (geometry_digest, vi_type, date.date())
+
+def _vi_statistics(geometry: dict, vi_type: str, date: datetime) -> dict:
+    """gee_service.get_vi_statistics, cached by geometry, VI type and day"""
+    key = _gee_cache_key(geometry, vi_type, date)
+    stats = _gee_stats_cache.get(key)
+    if stats is None:
+        stats = gee_service.get_vi_statistics(geometry=geometry, vi_type=vi_type, date=date)
+        _gee_stats_cache.set(key, stats)
+    return {**stats, "measurement_date": date.isoformat()}
+
+def _vi_overlay(geometry: dict, vi_type: str, date: datetime) -> str:
+    """gee_service.generate_vi_overlay, cached like _vi_statistics; failures ("") aren't cached"""
+    key = _gee_cache_key(geometry, vi_type, date)
+    overlay = _gee_overlay_cache.get(key)
+    if overlay is None:
+        overlay = gee_service.generate_vi_overlay(geometry=geometry, vi_type=vi_type, date=date)
+        if overlay:
+            _gee_overlay_cache.set(key, overlay)
+    return overlay
+
+def _snapshot_etag(snapshot_ids) -> str:
+    """ETag for a set of snapshots; rows are never edited in place, so ids identify the content"""
+    digest = hashlib.blake2b(digest_size=8)
+    for snapshot_id in snapshot_ids:
+        digest.update(snapshot_id.bytes)
+    return '"' + digest.hexdigest() + '"'
+
+def _conditional_response(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Attach caching headers; returns a bodyless 304 if the client already has this version"""
+    # Snapshots change whenever a user runs an analysis, so clients revalidate every time
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
+def _save_timeseries(db: Session, rows: List[dict]) -> int:
+    """Insert timeseries points in one statement, skipping ones already stored
+
+    Returns the number of new rows. Relies on uq_time_series_field_vi_date_value.
+    """
+    if not rows:
+        return 0
+    stmt = pg_insert(VITimeSeries).values(rows).on_conflict_do_nothing(
+        index_elements=["field_id", "vi_type", "measurement_date"]
+    )
+    return db.execute(stmt).rowcount
+
+def _serve_timeseries(
     field_id: UUID,
     vi_type: str,
-    start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None,
-    analysis_type: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get VI timeseries data for a field - fetches from GEE when user explicitly requests"""
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    analysis_type: Optional[str],
+    current_user: UserResponse,
+    db: Session
+) -> dict:
+    """Timeseries for a field: stored points when they cover the range, otherwise fetched from GEE and stored
+
+    Shared by /vi-analysis/timeseries and the /vi compatibility route, which
+    differ only in how they report failures.
+    """
     # Verify field ownership
     field = db.query(Field).filter(
         Field.id == field_id,
@@ -51,88 +126,122 @@ async def get_vi_timeseries_compat(
     if not start_date:
         start_date = end_date - timedelta(days=90)  # Last 3 months
     
-    try:
-        # Check if we have COMPLETE cached data for the requested range
-        # For full_year analysis, we need data for most months, not just a few
-        db_timeseries = db.query(VITimeSeries).filter(
-            VITimeSeries.field_id == field_id,
-            VITimeSeries.vi_type == vi_type,
-            VITimeSeries.measurement_date.between(start_date, end_date)
-        ).order_by(VITimeSeries.measurement_date.asc()).all()
-        
-        # Calculate expected number of data points based on analysis type
-        cache_is_complete = False
-        if db_timeseries:
-            if analysis_type == "full_year":
-                # For full year, expect at least 6 months of data
-                unique_months = set(ts.measurement_date.month for ts in db_timeseries)
-                cache_is_complete = len(unique_months) >= 6
-            elif analysis_type == "monthly_range":
-                # For monthly range, check if we have data points for the range
-                expected_months = (end_date.month - start_date.month + 1) if end_date.month >= start_date.month else 1
-                unique_months = set(ts.measurement_date.month for ts in db_timeseries)
-                cache_is_complete = len(unique_months) >= expected_months
-            elif analysis_type == "ten_year_avg":
-                # For 10-year avg, expect at least 5 years of data
-                unique_years = set(ts.measurement_date.year for ts in db_timeseries)
-                cache_is_complete = len(unique_years) >= 5
-            else:
-                # Default: accept cached data if we have any
-                cache_is_complete = len(db_timeseries) > 0
-        
-        if cache_is_complete:
-            print(f"📦 Using cached data: {len(db_timeseries)} points")
-            return {
-                "timeseries": [VITimeSeriesResponse.model_validate(ts) for ts in db_timeseries],
-                "source": "database"
-            }
-        
-        gee_timeseries = gee_service.get_timeseries_data(
-            field.geometry, 
-            vi_type, 
-            start_date, 
-            end_date,
-            analysis_type
-        )
-        
-        for datapoint in gee_timeseries:
+    # Check if we have COMPLETE cached data for the requested range
+    # For full_year analysis, we need data for most months, not just a few.
+    # Counted in the database; the points themselves are only read when complete
+    in_range = (
+        VITimeSeries.field_id == field_id,
+        VITimeSeries.vi_type == vi_type,
+        VITimeSeries.measurement_date.between(start_date, end_date)
+    )
+    point_count, month_count, year_count = db.execute(
+        select(
+            func.count(),
+            func.count(func.distinct(extract("month", VITimeSeries.measurement_date))),
+            func.count(func.distinct(extract("year", VITimeSeries.measurement_date)))
+        ).where(*in_range)
+    ).one()
+    
+    # Calculate expected number of data points based on analysis type
+    cache_is_complete = False
+    if point_count:
+        if analysis_type == "full_year":
+            # For full year, expect at least 6 months of data
+            cache_is_complete = month_count >= 6
+            logger.debug("Full year cache check: found %d unique months", month_count)
+        elif analysis_type == "monthly_range":
+            # For monthly range, check if we have data points for the requested range
+            expected_months = (end_date.month - start_date.month + 1) if end_date.month >= start_date.month else 1
+            cache_is_complete = month_count >= expected_months
+            logger.debug("Monthly range cache check: found %d/%d months", month_count, expected_months)
+        elif analysis_type == "ten_year_avg":
+            # For 10-year avg, expect at least 5 years of data
+            cache_is_complete = year_count >= 5
+            logger.debug("10-year cache check: found %d unique years", year_count)
+        else:
+            # Default: accept cached data if we have any
+            cache_is_complete = True
+    
+    if cache_is_complete:
+        db_timeseries = db.execute(
+            select(VITimeSeries.__table__).where(*in_range).order_by(VITimeSeries.measurement_date.asc())
+        ).all()
+        logger.debug("Using complete cached data: %d points", len(db_timeseries))
+        return {
+            "timeseries": _timeseries_adapter.validate_python(db_timeseries, from_attributes=True),
+            "source": "database",
+            "count": len(db_timeseries)
+        }
+    
+    # If no data in database, fetch from Google Earth Engine
+    # This is OK because AnalysisPage calls this after user explicitly selects time range
+    logger.debug("Fetching %s timeseries from GEE for field %s", vi_type, field_id)
+    
+    gee_timeseries = gee_service.get_timeseries_data(
+        geometry=field.geometry,
+        vi_type=vi_type,
+        start_date=start_date,
+        end_date=end_date,
+        analysis_type=analysis_type
+    )
+    
+    # Save to database for future use
+    rows = []
+    for datapoint in gee_timeseries:
+        try:
             measurement_date = datetime.fromisoformat(datapoint['date'].replace('Z', '+00:00'))
             
-            existing = db.query(VITimeSeries).filter(
-                VITimeSeries.field_id == field_id,
-                VITimeSeries.vi_type == vi_type,
-                VITimeSeries.measurement_date == measurement_date
-            ).first()
-            
-            if not existing:
-                timeseries_entry = VITimeSeries(
-                    field_id=field_id,
-                    vi_type=vi_type,
-                    measurement_date=measurement_date,
-                    vi_value=datapoint['value']
-                )
-                db.add(timeseries_entry)
-        
-        db.commit()
-        
-        formatted_timeseries = []
-        for d in gee_timeseries:
-            formatted_timeseries.append({
-                "measurement_date": d['date'],
-                "vi_value": d['value']
+            rows.append({
+                "field_id": field_id,
+                "vi_type": vi_type,
+                "measurement_date": measurement_date,
+                "vi_value": datapoint['value']
             })
-        
-        print(f"✅ Successfully fetched {len(formatted_timeseries)} data points from GEE")
-        
-        return {
-            "timeseries": formatted_timeseries,
-            "source": "google_earth_engine",
-            "analysis_type": analysis_type,
-            "count": len(formatted_timeseries)
-        }
-        
+        except Exception as e:
+            logger.debug("Skipping malformed data point: %s", e)
+            continue
+    
+    saved_count = _save_timeseries(db, rows)
+    db.commit()
+    logger.debug("Saved %d new timeseries records", saved_count)
+    
+    # Return the data
+    formatted_timeseries = []
+    for d in gee_timeseries:
+        formatted_timeseries.append({
+            "measurement_date": d['date'],
+            "vi_value": d['value']
+        })
+    
+    logger.debug("Fetched %d data points from GEE", len(formatted_timeseries))
+    
+    return {
+        "timeseries": formatted_timeseries,
+        "source": "google_earth_engine",
+        "analysis_type": analysis_type,
+        "count": len(formatted_timeseries)
+    }
+
+# Handlers here block on the sync Session and on GEE calls, so they are all
+# plain def: FastAPI runs them in the threadpool instead of on the event loop
+@vi_router.get("/timeseries/{field_id}")
+def get_vi_timeseries_compat(
+    field_id: UUID,
+    vi_type: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    analysis_type: Optional[str] = None,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get VI timeseries data for a field - fetches from GEE when user explicitly requests"""
+    try:
+        return _serve_timeseries(field_id, vi_type, start_date, end_date, analysis_type, current_user, db)
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error getting timeseries data: {e}")
+        # The compat route reports failures in the body rather than as a 500
+        logger.exception("Error getting timeseries data")
         return {
             "timeseries": [],
             "source": "error",
@@ -140,15 +249,15 @@ async def get_vi_timeseries_compat(
         }
 
 @vi_router.get("/snapshots/{field_id}")
-async def get_vi_snapshots_compat(
+def get_vi_snapshots_compat(
     field_id: UUID,
     vi_type: Optional[str] = "NDVI",
     limit: Optional[int] = 4,
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get VI snapshots for a field"""
-    field = db.query(Field).filter(
+    field = db.query(Field.id).filter(
         Field.id == field_id,
         Field.user_id == current_user.id
     ).first()
@@ -159,12 +268,14 @@ async def get_vi_snapshots_compat(
             detail="Field not found"
         )
     
-    snapshots = db.query(VISnapshot).filter(
-        VISnapshot.field_id == field_id,
-        VISnapshot.vi_type == vi_type
-    ).order_by(VISnapshot.snapshot_date.desc()).limit(limit).all()
+    snapshots = db.execute(
+        select(*_SNAPSHOT_RESPONSE_COLUMNS).where(
+            VISnapshot.field_id == field_id,
+            VISnapshot.vi_type == vi_type
+        ).order_by(VISnapshot.snapshot_date.desc()).limit(limit)
+    ).all()
     
-    return [VISnapshotResponse.model_validate(snapshot) for snapshot in snapshots]
+    return _snapshots_adapter.validate_python(snapshots, from_attributes=True)
 
 
 
@@ -173,7 +284,7 @@ async def get_vi_snapshots_compat(
 def generate_vi_overlay(
     request: Request,
     overlay_request: VIOverlayRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Generate VI overlay for given geometry and parameters"""
@@ -182,14 +293,14 @@ def generate_vi_overlay(
         analysis_date = overlay_request.date or datetime.now()
         
         # Get VI statistics from GEE
-        stats = gee_service.get_vi_statistics(
+        stats = _vi_statistics(
             geometry=overlay_request.geometry,
             vi_type=overlay_request.vi_type,
             date=analysis_date
         )
         
         # Generate overlay image
-        overlay_url = gee_service.generate_vi_overlay(
+        overlay_url = _vi_overlay(
             geometry=overlay_request.geometry,
             vi_type=overlay_request.vi_type,
             date=analysis_date
@@ -214,12 +325,12 @@ def generate_vi_overlay(
 def delete_field_snapshots(
     field_id: UUID,
     vi_type: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete VI snapshots for a field"""
     # Verify field ownership
-    field = db.query(Field).filter(
+    field = db.query(Field.id).filter(
         Field.id == field_id,
         Field.user_id == current_user.id
     ).first()
@@ -236,19 +347,12 @@ def delete_field_snapshots(
         
         if vi_type:
             query = query.filter(VISnapshot.vi_type == vi_type)
-            print(f"🗑️ Deleting {vi_type} snapshots for field {field_id}")
-        else:
-            print(f"🗑️ Deleting ALL snapshots for field {field_id}")
-        
-        # Get snapshots to delete (for counting)
-        snapshots_to_delete = query.all()
-        count_to_delete = len(snapshots_to_delete)
         
-        # Delete snapshots
-        deleted_count = query.delete()
+        # Delete snapshots; the statement's rowcount is the number removed
+        deleted_count = query.delete(synchronize_session=False)
         db.commit()
         
-        print(f"✅ Deleted {deleted_count} snapshots")
+        logger.debug("Deleted %d %s snapshots for field %s", deleted_count, vi_type or "ALL", field_id)
         
         return {
             "message": f"Deleted {deleted_count} snapshots successfully",
@@ -257,135 +361,224 @@ def delete_field_snapshots(
             "field_id": str(field_id)
         }
         
-    except Exception as e:
-        print(f"❌ Error deleting snapshots: {e}")
+    except Exception:
+        logger.exception("Error deleting snapshots for field %s", field_id)
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to delete snapshots"
         )
 
-@router.post("/{field_id}/analyze-historical")
+def _analyze_historical(
+    db: Session,
+    field_id: UUID,
+    user_id: UUID,
+    geometry: dict,
+    vi_type: str,
+    count: int,
+    clear_old: bool
+) -> dict:
+    """Fetch recent GEE images for a field and store one snapshot per new day"""
+    logger.debug("Generating %d historical %s snapshots for field %s", count, vi_type, field_id)
+    
+    # Clear old snapshots of the same VI type if requested
+    if clear_old:
+        old_snapshots = db.query(VISnapshot).filter(
+            VISnapshot.field_id == field_id,
+            VISnapshot.vi_type == vi_type
+        )
+        old_count = old_snapshots.delete(synchronize_session=False)
+        db.commit()
+        if old_count > 0:
+            logger.debug("Cleared %d old %s snapshots", old_count, vi_type)
+    
+    # Use the new get_latest_images_data function for diverse, clean historical data
+    historical_images = gee_service.get_latest_images_data(
+        geometry=geometry,
+        vi_type=vi_type,
+        limit=count
+    )
+    
+    if not historical_images:
+        logger.debug("No historical images available for field %s", field_id)
+        return {
+            "message": "No historical images available for this field",
+            "snapshots_created": 0,
+            "vi_type": vi_type,
+            "field_id": str(field_id)
+        }
+    
+    # Parse every acquisition date up front so existing snapshots can be
+    # looked up in one query instead of one per image
+    dated_images = []
+    for i, image_data in enumerate(historical_images):
+        try:
+            dated_images.append((i, image_data, datetime.fromisoformat(image_data['acquisition_date'].replace('Z', '+00:00'))))
+        except Exception:
+            logger.exception("Failed to parse acquisition date of image %d", i + 1)
+    
+    # Days that already have a snapshot; the field/VI filter narrows the
+    # rows through ix_snapshots_field_vi_date before the date() comparison
+    taken_dates = set()
+    if dated_images:
+        taken_dates = {
+            row[0] for row in db.query(func.date(VISnapshot.snapshot_date)).filter(
+                VISnapshot.field_id == field_id,
+                VISnapshot.vi_type == vi_type,
+                func.date(VISnapshot.snapshot_date).in_([analysis_date.date() for _, _, analysis_date in dated_images])
+            )
+        }
+    
+    snapshots_created = []
+    
+    for i, image_data, analysis_date in dated_images:
+        try:
+            logger.debug("Processing snapshot %d/%d for date %s", i + 1, len(historical_images), analysis_date.date())
+            
+            # Skip if a snapshot already exists for this date (within same day)
+            if analysis_date.date() in taken_dates:
+                logger.debug("Snapshot already exists for %s, skipping", analysis_date.date())
+                continue
+            
+            # Save snapshot to database using data from get_latest_images_data
+            snapshots_created.append(VISnapshot(
+                field_id=field_id,
+                user_id=user_id,
+                vi_type=vi_type,
+                snapshot_date=analysis_date,
+                mean_value=image_data['mean_value'],
+                min_value=image_data['min_value'],
+                max_value=image_data['max_value'],
+                overlay_data=image_data['overlay_url'],
+                status_message=image_data['analysis_message']
+            ))
+            taken_dates.add(analysis_date.date())
+            
+        except Exception:
+            logger.exception("Failed to create snapshot %d", i + 1)
+            continue
+    
+    # Commit all snapshots at once
+    db.add_all(snapshots_created)
+    db.commit()
+    
+    logger.debug("Created %d historical snapshots from %d images", len(snapshots_created), len(historical_images))
+    
+    return {
+        "message": f"Historical analysis completed for {len(snapshots_created)} snapshots with unique dates",
+        "snapshots_created": len(snapshots_created),
+        "vi_type": vi_type,
+        "field_id": str(field_id),
+        "unique_dates": len(snapshots_created)  # one per day, enforced above
+    }
+
+def _run_historical_job(
+    job_id: UUID,
+    field_id: UUID,
+    user_id: UUID,
+    vi_type: str,
+    count: int,
+    clear_old: bool
+):
+    """Background worker for analyze-historical; records progress on the job row
+
+    State changes are Core UPDATEs so a job deleted with its field mid-run
+    just matches no rows instead of failing the final commit.
+    """
+    def set_state(**values):
+        db.execute(update(AnalysisJob).where(AnalysisJob.id == job_id).values(**values))
+        db.commit()
+    
+    db = SessionLocal()
+    try:
+        if db.query(AnalysisJob.id).filter(AnalysisJob.id == job_id).first() is None:
+            logger.warning("Analysis job %s no longer exists, skipping", job_id)
+            return
+        set_state(status="running")
+        
+        geometry = db.query(Field.geometry).filter(Field.id == field_id).scalar()
+        if geometry is None:
+            set_state(status="failed", error="Field not found or has no geometry")
+            return
+        
+        try:
+            result = _analyze_historical(db, field_id, user_id, geometry, vi_type, count, clear_old)
+        except Exception as e:
+            logger.exception("Historical analysis failed for job %s", job_id)
+            db.rollback()
+            set_state(status="failed", error=str(e))
+        else:
+            set_state(status="completed", result=result)
+    finally:
+        db.close()
+
+@router.post("/{field_id}/analyze-historical", status_code=status.HTTP_202_ACCEPTED)
 @limiter.limit("5/minute")
 def analyze_historical_vi(
     request: Request,
     field_id: UUID,
+    background_tasks: BackgroundTasks,
     vi_type: str = "NDVI",
     count: int = 4,
     clear_old: bool = True,
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Generate multiple historical VI snapshots for a field"""
-    # Verify field ownership
-    field = db.query(Field).filter(
+    """Queue generation of historical VI snapshots for a field
+    
+    The GEE ingest takes tens of seconds, so it runs after the response is
+    sent; poll the returned status_url for the outcome.
+    """
+    # Verify field ownership; the job loads the geometry itself
+    field_exists = db.query(Field.id).filter(
         Field.id == field_id,
         Field.user_id == current_user.id
     ).first()
     
-    if not field:
+    if not field_exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Field not found"
         )
     
-    try:
-        print(f"🔍 Generating {count} historical {vi_type} snapshots for field {field_id}")
-        
-        # Clear old snapshots of the same VI type if requested
-        if clear_old:
-            print(f"🗑️ Clearing old {vi_type} snapshots...")
-            old_snapshots = db.query(VISnapshot).filter(
-                VISnapshot.field_id == field_id,
-                VISnapshot.vi_type == vi_type
-            )
-            old_count = old_snapshots.count()
-            if old_count > 0:
-                old_snapshots.delete()
-                db.commit()
-                print(f"✅ Cleared {old_count} old snapshots")
-        
-        # Use the new get_latest_images_data function for diverse, clean historical data
-        historical_images = gee_service.get_latest_images_data(
-            geometry=field.geometry,
-            vi_type=vi_type,
-            limit=count
-        )
-        
-        if not historical_images:
-            print("⚠️ No historical images available, cannot create snapshots")
-            return {
-                "message": "No historical images available for this field",
-                "snapshots_created": 0,
-                "vi_type": vi_type,
-                "field_id": str(field_id)
-            }
-        
-        snapshots_created = []
-        
-        for i, image_data in enumerate(historical_images):
-            try:
-                # Parse the acquisition date
-                analysis_date = datetime.fromisoformat(image_data['acquisition_date'].replace('Z', '+00:00'))
-                
-                print(f"📅 Processing snapshot {i+1}/{len(historical_images)} for date: {analysis_date.strftime('%Y-%m-%d')}")
-                
-                # Check if snapshot already exists for this date (within same day)
-                from sqlalchemy import func, Date
-                existing = db.query(VISnapshot).filter(
-                    VISnapshot.field_id == field_id,
-                    VISnapshot.vi_type == vi_type,
-                    func.date(VISnapshot.snapshot_date) == analysis_date.date()
-                ).first()
-                
-                if existing:
-                    print(f"⚠️ Snapshot already exists for {analysis_date.date()}, skipping")
-                    continue
-                
-                # Save snapshot to database using data from get_latest_images_data
-                snapshot = VISnapshot(
-                    field_id=field_id,
-                    user_id=current_user.id,
-                    vi_type=vi_type,
-                    snapshot_date=analysis_date,
-                    mean_value=image_data['mean_value'],
-                    min_value=image_data['min_value'],
-                    max_value=image_data['max_value'],
-                    overlay_data=image_data['overlay_url'],
-                    status_message=image_data['analysis_message']
-                )
-                
-                db.add(snapshot)
-                snapshots_created.append(snapshot)
-                
-            except Exception as e:
-                print(f"❌ Failed to create snapshot {i+1}: {e}")
-                continue
-        
-        # Commit all snapshots at once
-        db.commit()
-        
-        # Refresh all snapshots
-        for snapshot in snapshots_created:
-            db.refresh(snapshot)
-        
-        print(f"✅ Successfully created {len(snapshots_created)} historical snapshots from {len(historical_images)} images")
-        
-        return {
-            "message": f"Historical analysis completed for {len(snapshots_created)} snapshots with unique dates",
-            "snapshots_created": len(snapshots_created),
-            "vi_type": vi_type,
-            "field_id": str(field_id),
-            "unique_dates": len(set(s.snapshot_date.date() for s in snapshots_created))
-        }
-        
-    except Exception as e:
-        print(f"❌ Historical analysis failed: {e}")
-        db.rollback()
+    job = AnalysisJob(
+        user_id=current_user.id,
+        field_id=field_id,
+        vi_type=vi_type,
+        status="queued"
+    )
+    db.add(job)
+    db.commit()
+    
+    background_tasks.add_task(
+        _run_historical_job, job.id, field_id, current_user.id, vi_type, count, clear_old
+    )
+    
+    return {
+        "job_id": str(job.id),
+        "status": job.status,
+        "status_url": f"/vi-analysis/jobs/{job.id}"
+    }
+
+@router.get("/jobs/{job_id}", response_model=AnalysisJobResponse)
+def get_analysis_job(
+    job_id: UUID,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Status of a background analysis job"""
+    job = db.query(AnalysisJob).filter(
+        AnalysisJob.id == job_id,
+        AnalysisJob.user_id == current_user.id
+    ).first()
+    
+    if not job:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to generate historical analysis: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
         )
+    
+    return job
 
 @router.post("/{field_id}/analyze")
 @limiter.limit("10/minute")
@@ -393,7 +586,7 @@ def analyze_and_save_vi(
     request: Request,
     field_id: UUID,
     vi_type: str,
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Analyze VI for a field and save snapshot"""
@@ -413,14 +606,14 @@ def analyze_and_save_vi(
         analysis_date = datetime.now()
         
         # Get VI statistics from GEE
-        stats = gee_service.get_vi_statistics(
+        stats = _vi_statistics(
             geometry=field.geometry,
             vi_type=vi_type,
             date=analysis_date
         )
         
         # Generate overlay
-        overlay_url = gee_service.generate_vi_overlay(
+        overlay_url = _vi_overlay(
             geometry=field.geometry,
             vi_type=vi_type,
             date=analysis_date
@@ -462,12 +655,14 @@ def analyze_and_save_vi(
 def get_current_vi_analysis(
     field_id: UUID,
     vi_type: str,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get current VI analysis for a field - returns latest snapshot from database"""
     # Verify field ownership
-    field = db.query(Field).filter(
+    field = db.query(Field.id).filter(
         Field.id == field_id,
         Field.user_id == current_user.id
     ).first()
@@ -478,13 +673,19 @@ def get_current_vi_analysis(
             detail="Field not found"
         )
     
-    # Get latest snapshot from database - do NOT auto-fetch from GEE
-    latest_snapshot = db.query(VISnapshot).filter(
+    # Get latest snapshot from database - do NOT auto-fetch from GEE.
+    # Its id is the version; the overlay is only loaded if the client lacks it
+    latest_id = db.query(VISnapshot.id).filter(
         VISnapshot.field_id == field_id,
         VISnapshot.vi_type == vi_type
-    ).order_by(VISnapshot.snapshot_date.desc()).first()
+    ).order_by(VISnapshot.snapshot_date.desc()).limit(1).scalar()
     
-    if latest_snapshot:
+    not_modified = _conditional_response(request, response, _snapshot_etag([latest_id] if latest_id else []))
+    if not_modified:
+        return not_modified
+    
+    if latest_id:
+        latest_snapshot = db.get(VISnapshot, latest_id, options=[undefer(VISnapshot.overlay_data)])
         return {
             "field_id": str(field_id),
             "vi_type": vi_type,
@@ -511,14 +712,16 @@ def get_current_vi_analysis(
 @router.get("/snapshots/{field_id}")
 def get_field_snapshots(
     field_id: UUID,
+    request: Request,
+    response: Response,
     vi_type: Optional[str] = None,
     limit: int = 10,
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get VI snapshots for a field - only returns existing data, does NOT auto-create"""
     # Verify field ownership
-    field = db.query(Field).filter(
+    field = db.query(Field.id).filter(
         Field.id == field_id,
         Field.user_id == current_user.id
     ).first()
@@ -529,16 +732,26 @@ def get_field_snapshots(
             detail="Field not found"
         )
     
-    query = db.query(VISnapshot).filter(VISnapshot.field_id == field_id)
+    query = db.query(VISnapshot.id).filter(VISnapshot.field_id == field_id)
     
     if vi_type:
         query = query.filter(VISnapshot.vi_type == vi_type)
     
-    snapshots = query.order_by(VISnapshot.snapshot_date.desc()).limit(limit).all()
+    # The ids of the page identify it; overlays are only loaded on a miss
+    snapshot_ids = [row.id for row in query.order_by(VISnapshot.snapshot_date.desc()).limit(limit)]
+    not_modified = _conditional_response(request, response, _snapshot_etag(snapshot_ids))
+    if not_modified:
+        return not_modified
+    
+    snapshots = db.execute(
+        select(*_SNAPSHOT_RESPONSE_COLUMNS).where(
+            VISnapshot.id.in_(snapshot_ids)
+        ).order_by(VISnapshot.snapshot_date.desc())
+    ).all() if snapshot_ids else []
     
     # Return only existing snapshots - do NOT auto-create from GEE
     # User must explicitly click "analyze" button to fetch new data
-    return [VISnapshotResponse.model_validate(snapshot) for snapshot in snapshots]
+    return _snapshots_adapter.validate_python(snapshots, from_attributes=True)
 
 
 
@@ -549,130 +762,16 @@ def get_field_timeseries(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     analysis_type: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get VI timeseries data for a field - fetches from GEE when user explicitly requests"""
-    # Verify field ownership
-    field = db.query(Field).filter(
-        Field.id == field_id,
-        Field.user_id == current_user.id
-    ).first()
-    
-    if not field:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Field not found"
-        )
-    
-    # Set default date range if not provided
-    if not end_date:
-        end_date = datetime.now()
-    if not start_date:
-        start_date = end_date - timedelta(days=90)  # Last 3 months
-    
     try:
-        # Check if we have COMPLETE cached data for the requested range
-        # For full_year analysis, we need data for most months, not just a few
-        db_timeseries = db.query(VITimeSeries).filter(
-            VITimeSeries.field_id == field_id,
-            VITimeSeries.vi_type == vi_type,
-            VITimeSeries.measurement_date.between(start_date, end_date)
-        ).order_by(VITimeSeries.measurement_date.asc()).all()
-        
-        # Calculate expected number of data points based on analysis type
-        cache_is_complete = False
-        if db_timeseries:
-            if analysis_type == "full_year":
-                # For full year, expect at least 6 months of data
-                unique_months = set(ts.measurement_date.month for ts in db_timeseries)
-                cache_is_complete = len(unique_months) >= 6
-                print(f"📊 Full year cache check: found {len(unique_months)} unique months")
-            elif analysis_type == "monthly_range":
-                # For monthly range, check if we have data points for the requested range
-                expected_months = (end_date.month - start_date.month + 1) if end_date.month >= start_date.month else 1
-                unique_months = set(ts.measurement_date.month for ts in db_timeseries)
-                cache_is_complete = len(unique_months) >= expected_months
-                print(f"📊 Monthly range cache check: found {len(unique_months)}/{expected_months} months")
-            elif analysis_type == "ten_year_avg":
-                # For 10-year avg, expect at least 5 years of data
-                unique_years = set(ts.measurement_date.year for ts in db_timeseries)
-                cache_is_complete = len(unique_years) >= 5
-                print(f"📊 10-year cache check: found {len(unique_years)} unique years")
-            else:
-                # Default: accept cached data if we have any
-                cache_is_complete = len(db_timeseries) > 0
-        
-        if cache_is_complete:
-            print(f"📦 Using complete cached data: {len(db_timeseries)} points")
-            return {
-                "timeseries": [VITimeSeriesResponse.model_validate(ts) for ts in db_timeseries],
-                "source": "database",
-                "count": len(db_timeseries)
-            }
-        
-        # If no data in database, fetch from Google Earth Engine
-        # This is OK because AnalysisPage calls this after user explicitly selects time range
-        print(f"🔍 Fetching {vi_type} timeseries from GEE for field {field_id}")
-        
-        gee_timeseries = gee_service.get_timeseries_data(
-            geometry=field.geometry,
-            vi_type=vi_type,
-            start_date=start_date,
-            end_date=end_date,
-            analysis_type=analysis_type
-        )
-        
-        # Save to database for future use
-        saved_count = 0
-        for datapoint in gee_timeseries:
-            try:
-                if 'T' in datapoint['date']:
-                    measurement_date = datetime.fromisoformat(datapoint['date'].replace('Z', '+00:00'))
-                else:
-                    measurement_date = datetime.fromisoformat(datapoint['date'])
-                
-                existing = db.query(VITimeSeries).filter(
-                    VITimeSeries.field_id == field_id,
-                    VITimeSeries.vi_type == vi_type,
-                    VITimeSeries.measurement_date == measurement_date
-                ).first()
-                
-                if not existing:
-                    timeseries_entry = VITimeSeries(
-                        field_id=field_id,
-                        vi_type=vi_type,
-                        measurement_date=measurement_date,
-                        vi_value=datapoint['value']
-                    )
-                    db.add(timeseries_entry)
-                    saved_count += 1
-            except Exception as e:
-                print(f"Error saving data point: {e}")
-                continue
-        
-        db.commit()
-        print(f"💾 Saved {saved_count} new records to database")
-        
-        # Return the data
-        formatted_timeseries = []
-        for d in gee_timeseries:
-            formatted_timeseries.append({
-                "measurement_date": d['date'],
-                "vi_value": d['value']
-            })
-        
-        print(f"✅ Successfully fetched {len(formatted_timeseries)} data points from GEE")
-        
-        return {
-            "timeseries": formatted_timeseries,
-            "source": "google_earth_engine",
-            "analysis_type": analysis_type,
-            "count": len(formatted_timeseries)
-        }
-        
+        return _serve_timeseries(field_id, vi_type, start_date, end_date, analysis_type, current_user, db)
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"❌ Error getting timeseries: {e}")
+        logger.exception("Error getting timeseries")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get timeseries data: {str(e)}"
@@ -683,12 +782,14 @@ def get_field_timeseries(
 @router.get("/latest/{field_id}")  
 def get_latest_vi_values(
     field_id: UUID,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get latest VI values for all indices for a field"""
     # Verify field ownership
-    field = db.query(Field).filter(
+    field = db.query(Field.id).filter(
         Field.id == field_id,
         Field.user_id == current_user.id
     ).first()
@@ -700,22 +801,31 @@ def get_latest_vi_values(
         )
     
     vi_types = ['NDVI', 'EVI', 'GNDVI', 'NDWI', 'SAVI', 'VCI']
-    latest_values = {}
+    latest_values = dict.fromkeys(vi_types)
+    
+    # Newest snapshot per VI type in one query (DISTINCT ON, served by ix_snapshots_field_vi_date)
+    latest_snapshots = db.query(
+        VISnapshot.vi_type,
+        VISnapshot.mean_value,
+        VISnapshot.snapshot_date,
+        VISnapshot.status_message
+    ).distinct(VISnapshot.vi_type).filter(
+        VISnapshot.field_id == field_id,
+        VISnapshot.vi_type.in_(vi_types)
+    ).order_by(VISnapshot.vi_type, VISnapshot.snapshot_date.desc())
+    
+    for latest_snapshot in latest_snapshots:
+        latest_values[latest_snapshot.vi_type] = {
+            "value": latest_snapshot.mean_value,
+            "date": latest_snapshot.snapshot_date.isoformat(),
+            "analysis_message": latest_snapshot.status_message
+        }
     
-    for vi_type in vi_types:
-        latest_snapshot = db.query(VISnapshot).filter(
-            VISnapshot.field_id == field_id,
-            VISnapshot.vi_type == vi_type
-        ).order_by(VISnapshot.snapshot_date.desc()).first()
-        
-        if latest_snapshot:
-            latest_values[vi_type] = {
-                "value": latest_snapshot.mean_value,
-                "date": latest_snapshot.snapshot_date.isoformat(),
-                "analysis_message": latest_snapshot.analysis_message
-            }
-        else:
-            latest_values[vi_type] = None
+    # Small payload: the ETag is simply a digest of it
+    etag = '"' + hashlib.blake2b(orjson.dumps(latest_values), digest_size=8).hexdigest() + '"'
+    not_modified = _conditional_response(request, response, etag)
+    if not_modified:
+        return not_modified
     
     return latest_values
 
@@ -725,7 +835,7 @@ def bulk_analyze_field(
     request: Request,
     field_id: UUID,
     vi_types: List[str],
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Analyze multiple VI types for a field at once"""
@@ -744,58 +854,59 @@ def bulk_analyze_field(
     results = {}
     analysis_date = datetime.now()
     
-    for vi_type in vi_types:
-        try:
-            # Get VI statistics
-            stats = gee_service.get_vi_statistics(
-                geometry=field.geometry,
-                vi_type=vi_type,
-                date=analysis_date
-            )
-            
-            # Generate overlay
-            overlay_url = gee_service.generate_vi_overlay(
-                geometry=field.geometry,
-                vi_type=vi_type,
-                date=analysis_date
-            )
-            
-            # Save snapshot
-            snapshot = VISnapshot(
-                field_id=field_id,
-                vi_type=vi_type,
-                snapshot_date=analysis_date,
-                mean_value=stats['mean_value'],
-                min_value=stats['min_value'],
-                max_value=stats['max_value'],
-                overlay_url=overlay_url,
-                analysis_message=stats['analysis_message']
+    # Every GEE call is independent network I/O, so all of them are issued at
+    # once and the request takes about as long as the slowest one
+    with ThreadPoolExecutor(max_workers=max(1, min(GEE_MAX_PARALLEL_CALLS, 2 * len(vi_types)))) as executor:
+        pending = {
+            vi_type: (
+                executor.submit(_vi_statistics, geometry=field.geometry, vi_type=vi_type, date=analysis_date),
+                executor.submit(_vi_overlay, geometry=field.geometry, vi_type=vi_type, date=analysis_date)
             )
-            
-            db.add(snapshot)
-            
-            # Save timeseries entry
-            timeseries_entry = VITimeSeries(
-                field_id=field_id,
-                vi_type=vi_type,
-                measurement_date=analysis_date,
-                vi_value=stats['mean_value']
-            )
-            
-            db.add(timeseries_entry)
-            
-            results[vi_type] = {
-                "success": True,
-                "stats": stats,
-                "overlay_url": overlay_url
-            }
-            
-        except Exception as e:
-            print(f"Error analyzing {vi_type}: {e}")
-            results[vi_type] = {
-                "success": False,
-                "error": str(e)
-            }
+            for vi_type in vi_types
+        }
+        
+        for vi_type, (stats_future, overlay_future) in pending.items():
+            try:
+                stats = stats_future.result()
+                overlay_url = overlay_future.result()
+                
+                # Save snapshot
+                snapshot = VISnapshot(
+                    field_id=field_id,
+                    user_id=current_user.id,
+                    vi_type=vi_type,
+                    snapshot_date=analysis_date,
+                    mean_value=stats['mean_value'],
+                    min_value=stats['min_value'],
+                    max_value=stats['max_value'],
+                    overlay_data=overlay_url,
+                    status_message=stats['analysis_message']
+                )
+                
+                db.add(snapshot)
+                
+                # Save timeseries entry
+                timeseries_entry = VITimeSeries(
+                    field_id=field_id,
+                    vi_type=vi_type,
+                    measurement_date=analysis_date,
+                    vi_value=stats['mean_value']
+                )
+                
+                db.add(timeseries_entry)
+                
+                results[vi_type] = {
+                    "success": True,
+                    "stats": stats,
+                    "overlay_url": overlay_url
+                }
+                
+            except Exception as e:
+                logger.exception("Error analyzing %s", vi_type)
+                results[vi_type] = {
+                    "success": False,
+                    "error": str(e)
+                }
     
     db.commit()
     
@@ -8,10 +8,10 @@ from .schemas import (
     ThumbnailCreate, ThumbnailResponse,
     # VI schemas
     VISnapshotCreate, VISnapshotResponse,
-    VITimeSeriesCreate, VITimeSeriesResponse,
+    VITimeSeriesCreate, VITimeSeriesResponse, AnalysisJobResponse,
     VIAnalysisRequest, VIOverlayRequest, VIOverlayResponse,
     # Utility schemas
-    GeocodeResponse, SearchLocationRequest, SearchLocationResponse
+    GeocodeResponse, BulkGeocodeResult, LatLng, SearchLocationRequest, SearchLocationResponse
 )
 
 __all__ = [
@@ -23,8 +23,8 @@ __all__ = [
     'ThumbnailCreate', 'ThumbnailResponse',
     # VI
     'VISnapshotCreate', 'VISnapshotResponse',
-    'VITimeSeriesCreate', 'VITimeSeriesResponse',
+    'VITimeSeriesCreate', 'VITimeSeriesResponse', 'AnalysisJobResponse',
     'VIAnalysisRequest', 'VIOverlayRequest', 'VIOverlayResponse',
     # Utility
-    'GeocodeResponse', 'SearchLocationRequest', 'SearchLocationResponse'
+    'GeocodeResponse', 'BulkGeocodeResult', 'LatLng', 'SearchLocationRequest', 'SearchLocationResponse'
 ]
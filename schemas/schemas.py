@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, computed_field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from uuid import UUID
@@ -15,10 +15,23 @@ class UserCreate(UserBase):
 
 class UserResponse(UserBase):
     id: UUID
-    age: Optional[int] = None
+    date_of_birth: Optional[datetime] = Field(default=None, exclude=True)
     created_at: datetime
     is_active: bool
 
+    @computed_field
+    @property
+    def age(self) -> Optional[int]:
+        """Age in years, derived from date of birth so it never goes stale"""
+        if self.date_of_birth is None:
+            return None
+        today = datetime.today()
+        dob = self.date_of_birth
+        age = today.year - dob.year
+        if (today.month, today.day) < (dob.month, dob.day):
+            age -= 1
+        return age
+
     class Config:
         from_attributes = True
 
@@ -122,6 +135,19 @@ class VITimeSeriesResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class AnalysisJobResponse(BaseModel):
+    id: UUID
+    field_id: UUID
+    vi_type: str
+    status: str
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
 # Request/Response schemas for API endpoints
 class VIAnalysisRequest(BaseModel):
     field_id: UUID
@@ -146,6 +172,15 @@ class GeocodeResponse(BaseModel):
     lat: float
     lng: float
 
+class BulkGeocodeResult(BaseModel):
+    address: Optional[str] = None  # null when the lookup was deferred
+    lat: float
+    lng: float
+
+class LatLng(BaseModel):
+    lat: float
+    lng: float
+
 class SearchLocationRequest(BaseModel):
     query: str
     
@@ -0,0 +1,113 @@
+"""
+Apply schema changes to an existing database
+
+create_all() only creates missing tables, so indexes/constraints/column
+changes made to models after a table exists are applied here. Every
+statement is idempotent - safe to run multiple times.
+"""
+from sqlalchemy import text
+from core.database import engine
+
+MIGRATIONS = [
+    (
+        "Covering indexes for login lookup by username/email",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_users_username_covering ON users (username) INCLUDE (id, password_hash, is_active);",
+            "CREATE INDEX IF NOT EXISTS ix_users_email_covering ON users (email) INCLUDE (id, password_hash, is_active);",
+        ],
+    ),
+    (
+        "Case-insensitive users.email",
+        [
+            "CREATE EXTENSION IF NOT EXISTS citext;",
+            "ALTER TABLE users ALTER COLUMN email TYPE citext;",
+        ],
+    ),
+    (
+        "Bounded users.password_hash wide enough for argon2id",
+        [
+            "ALTER TABLE users ALTER COLUMN password_hash TYPE varchar(128);",
+        ],
+    ),
+    (
+        "Drop stored users.age (computed from date_of_birth)",
+        [
+            "ALTER TABLE users DROP COLUMN IF EXISTS age;",
+        ],
+    ),
+    (
+        "Partial covering indexes on active users for login",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_users_username_active ON users (username) INCLUDE (id, password_hash) WHERE is_active;",
+            "CREATE INDEX IF NOT EXISTS ix_users_email_active ON users (email) INCLUDE (id, password_hash) WHERE is_active;",
+            "DROP INDEX IF EXISTS ix_users_username_covering;",
+            "DROP INDEX IF EXISTS ix_users_email_covering;",
+        ],
+    ),
+    (
+        "Composite index for per-user field lookups",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_fields_user_id_id ON fields (user_id, id);",
+        ],
+    ),
+    (
+        "One thumbnail per field (keeps the newest)",
+        [
+            # created_at is nullable; NULL sorts as oldest so every duplicate is ordered
+            "DELETE FROM thumbnails t USING thumbnails newer WHERE t.field_id = newer.field_id AND (COALESCE(t.created_at, '-infinity'), t.id) < (COALESCE(newer.created_at, '-infinity'), newer.id);",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_thumbnails_field_id ON thumbnails (field_id);",
+        ],
+    ),
+    (
+        "fields.updated_at (export cache key)",
+        [
+            "ALTER TABLE fields ADD COLUMN IF NOT EXISTS updated_at timestamp DEFAULT (now() AT TIME ZONE 'utc');",
+        ],
+    ),
+    (
+        "One time_series value per field, VI type and date (keeps the newest)",
+        [
+            # created_at is nullable; NULL sorts as oldest so every duplicate is ordered
+            "DELETE FROM time_series t USING time_series newer WHERE t.field_id = newer.field_id AND t.vi_type = newer.vi_type AND t.measurement_date = newer.measurement_date AND (COALESCE(t.created_at, '-infinity'), t.id) < (COALESCE(newer.created_at, '-infinity'), newer.id);",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_time_series_field_vi_date ON time_series (field_id, vi_type, measurement_date);",
+        ],
+    ),
+    (
+        "Composite index for latest-snapshot lookups",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_snapshots_field_vi_date ON snapshots (field_id, vi_type, snapshot_date DESC);",
+        ],
+    ),
+    (
+        "Covering unique index for timeseries range scans",
+        [
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_time_series_field_vi_date_value ON time_series (field_id, vi_type, measurement_date) INCLUDE (vi_value);",
+            "DROP INDEX IF EXISTS uq_time_series_field_vi_date;",
+        ],
+    ),
+    (
+        # Fails on the unique index if two usernames differ only in case;
+        # rename one of them first
+        "Case-insensitive users.username",
+        [
+            "ALTER TABLE users ALTER COLUMN username TYPE citext;",
+        ],
+    ),
+]
+
+def migrate_database():
+    """Apply all migrations in order"""
+    try:
+        with engine.begin() as conn:
+            for description, statements in MIGRATIONS:
+                print(f"Applying: {description}")
+                for statement in statements:
+                    conn.execute(text(statement))
+        print("\nDatabase migration completed!")
+        
+    except Exception as e:
+        print(f"Database error: {e}")
+        raise
+
+if __name__ == "__main__":
+    migrate_database()
@@ -4,12 +4,24 @@ import asyncio
 import aiohttp
 import json
 from pathlib import Path
+from core.cache import TTLCache
+
+# Shared by this service and /utils/geocode/reverse. Both request zoom 14
+# (subdistrict), so 4 decimals (~11 m) never changes the answer, and resolved
+# addresses don't change, so entries are kept for 30 days
+REVERSE_CACHE_PRECISION = 4
+REVERSE_CACHE_TTL_SECONDS = 30 * 24 * 3600
+
+def reverse_cache_key(lat: float, lng: float) -> tuple:
+    """Cache key for a reverse geocode: the coordinates rounded to REVERSE_CACHE_PRECISION"""
+    return (round(lat, REVERSE_CACHE_PRECISION), round(lng, REVERSE_CACHE_PRECISION))
 
 class GeocodingService:
     def __init__(self):
         """Initialize Geocoding Service with address mapping"""
         self.base_url = "https://nominatim.openstreetmap.org/reverse"
         self.mapping = self._load_mapping()
+        self._cache = TTLCache(maxsize=100_000, ttl=REVERSE_CACHE_TTL_SECONDS)
         
     def _load_mapping(self) -> dict:
         """Load EN→TH address mapping from JSON file"""
@@ -99,6 +111,11 @@ class GeocodingService:
         """Get address from latitude/longitude coordinates
         Returns: (address_th, address_en)
         """
+        cache_key = reverse_cache_key(lat, lng)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             params = {
                 'lat': lat,
@@ -119,6 +136,7 @@ class GeocodingService:
                         data = await response.json()
                         address_en = self._format_english_address(data)
                         address_th = self._format_thai_address(data)
+                        self._cache.set(cache_key, (address_th, address_en))
                         return (address_th, address_en)
                     else:
                         print(f"Geocoding failed with status: {response.status}")
@@ -253,6 +271,11 @@ class GeocodingService:
         """Synchronous version of reverse_geocode
         Returns: (address_th, address_en)
         """
+        cache_key = reverse_cache_key(lat, lng)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             params = {
                 'lat': lat,
@@ -272,6 +295,7 @@ class GeocodingService:
                 data = response.json()
                 address_en = self._format_english_address(data)
                 address_th = self._format_thai_address(data)
+                self._cache.set(cache_key, (address_th, address_en))
                 return (address_th, address_en)
             else:
                 print(f"Geocoding failed with status: {response.status_code}")
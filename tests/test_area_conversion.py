@@ -0,0 +1,35 @@
+import asyncio
+import math
+
+from routers.utils import convert_area_to_thai, convert_areas_to_thai
+
+
+def test_bulk_matches_single_for_normal_values():
+    areas = [0.0, 1600.0, 2000.0, 1599.99999, 12345.6]
+    bulk = convert_areas_to_thai(areas)
+    single = [asyncio.run(convert_area_to_thai(area)) for area in areas]
+    assert bulk == single
+    assert bulk[2]["rai"] == 1 and bulk[2]["ngan"] == 1 and bulk[2]["wah"] == 0
+
+
+def test_rounding_carries_into_the_next_unit():
+    areas = [1599.9999, 1599.99999, 1599.5, 399.9, 1998.5]
+    expected = [(1, 0, 0), (1, 0, 0), (1, 0, 0), (0, 1, 0), (1, 1, 0)]
+    for results in (convert_areas_to_thai(areas), [asyncio.run(convert_area_to_thai(area)) for area in areas]):
+        assert [(r["rai"], r["ngan"], r["wah"]) for r in results] == expected
+        assert all(r["ngan"] < 4 and r["wah"] < 100 for r in results)
+
+
+def test_bulk_falls_back_to_zero_for_non_finite_values():
+    results = convert_areas_to_thai([math.nan, math.inf, -math.inf, 1600.0])
+    for result in results[:3]:
+        assert (result["rai"], result["ngan"], result["wah"]) == (0, 0, 0)
+        assert result["thai_format"] == "0 ไร่ 0 งาน 0 ตร.วา"
+    assert (results[3]["rai"], results[3]["ngan"], results[3]["wah"]) == (1, 0, 0)
+
+
+def test_bulk_converts_values_beyond_int64_range_exactly():
+    area = 1e16
+    [result] = convert_areas_to_thai([area])
+    assert result["rai"] == int(area) // 1600
+    assert (result["ngan"], result["wah"]) == (0, 0)